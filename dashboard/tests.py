@@ -1,3 +1,129 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import User
+from exercises.models import Exercise
+from vocabulary.models import Word, StudentWord
+
+
+class TeacherDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pass', role='teacher')
+        words = [Word.objects.create(russian=f'слово{i}', english=f'word{i}') for i in range(3)]
+
+        cls.students = []
+        for i in range(5):
+            student = User.objects.create_user(f'student{i}', password='pass', role='student')
+            for word in words[:i % 3 + 1]:
+                StudentWord.objects.create(
+                    student=student,
+                    word=word,
+                    status='completed' if i == 0 else 'learning',
+                    times_attempted=4,
+                    times_correct=3
+                )
+            cls.students.append(student)
+
+        cls.students[1].last_login = timezone.now()
+        cls.students[1].save()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.teacher)
+
+    def test_query_count_does_not_depend_on_students(self):
+        # сессия, пользователь, версии учеников, ученики со статистикой, количество заданий
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('dashboard:teacher'))
+        self.assertEqual(response.status_code, 200)
+
+        for i in range(5, 10):
+            student = User.objects.create_user(f'student{i}', password='pass', role='student')
+            StudentWord.objects.create(student=student, word=Word.objects.first())
+
+        with self.assertNumQueries(5):
+            self.client.get(reverse('dashboard:teacher'))
+
+    def test_cached_until_student_data_changes(self):
+        self.client.get(reverse('dashboard:teacher'))
+
+        # сессия, пользователь, версии учеников
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('dashboard:teacher'))
+        self.assertContains(response, 'Выучено 0,')
+
+        student_word = StudentWord.objects.get(student=self.students[1], word__english='word1')
+        student_word.status = 'completed'
+        student_word.save()
+        response = self.client.get(reverse('dashboard:teacher'))
+        self.assertContains(response, 'Выучено 1,', count=2)
+
+        Exercise.objects.create(student=self.students[2], teacher=self.teacher)
+        response = self.client.get(reverse('dashboard:teacher'))
+        self.assertEqual(response.context['exercises_count'], 1)
+        self.assertContains(response, '<strong class="text-info">1</strong>', html=True)
+
+    def test_statistics(self):
+        response = self.client.get(reverse('dashboard:teacher'))
+        students = {student.username: student for student in response.context['students']}
+
+        self.assertEqual(students['student0'].word_count, 1)
+        self.assertEqual(students['student0'].completed_count, 1)
+        self.assertEqual(students['student2'].word_count, 3)
+        self.assertEqual(students['student2'].completed_count, 0)
+        self.assertEqual(students['student2'].accuracy, 75.0)
+        self.assertTrue(students['student1'].active_today)
+        self.assertFalse(students['student2'].active_today)
+
+        self.assertEqual(response.context['total_words'], 1 + 2 + 3 + 1 + 2)
+        self.assertEqual(response.context['total_completed'], 1)
+        self.assertEqual(response.context['active_today_count'], 1)
+
+
+class StudentDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.student_word = StudentWord.objects.create(
+            student=cls.student,
+            word=Word.objects.create(russian='кошка', english='cat')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def test_cached_until_student_data_changes(self):
+        self.client.get(reverse('dashboard:student'))
+
+        # сессия, пользователь, версия ученика с ближайшим повторением
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('dashboard:student'))
+        self.assertContains(response, 'Новых слов')
+        self.assertNotContains(response, 'Начать задание')
+
+        Exercise.objects.create(student=self.student, teacher=User.objects.create_user('teacher', role='teacher'))
+        response = self.client.get(reverse('dashboard:student'))
+        self.assertContains(response, 'Начать задание')
+
+        self.student_word.update_statistics(is_correct=True, response_time=1500)
+        response = self.client.get(reverse('dashboard:student'))
+        self.assertEqual(response.context['stats_detail']['total_attempts'], 1)
+        self.assertContains(response, '1 из 1 правильных')
+
+    def test_review_queue_refreshes_when_word_becomes_due(self):
+        review_at = timezone.now() + timedelta(hours=1)
+        StudentWord.objects.filter(pk=self.student_word.pk).update(next_review=review_at, review_order=review_at)
+        response = self.client.get(reverse('dashboard:student'))
+        self.assertNotContains(response, 'Повторить слова')
 
-# Create your tests here.
+        # Данные не менялись, но время повторения наступило
+        with mock.patch('django.utils.timezone.now', return_value=review_at + timedelta(minutes=1)):
+            response = self.client.get(reverse('dashboard:student'))
+        self.assertContains(response, 'Повторить слова')
@@ -80,4 +80,32 @@ AUTH_USER_MODEL = 'users.User'
 
 LOGIN_REDIRECT_URL = 'dashboard:home'
 LOGOUT_REDIRECT_URL = 'users:home'
-LOGIN_URL = 'users:login'
\ No newline at end of file
+LOGIN_URL = 'users:login'
+# Статистика слов: False — счетчики StudentWord обновляются при каждом ответе,
+# True — ответы только записываются в журнал WordAttempt, а счетчики
+# обновляет команда rollup_word_attempts (запускать по расписанию).
+# Перед выключением выполните rollup_word_attempts, чтобы учесть все ответы.
+WORD_STATS_ROLLUP = False
+
+# Буфер ответов (update_word_stat, пакеты ответов, letter soup): True — ответы
+# копятся в кэше WORD_STATS_BUFFER_CACHE и раз в WORD_STATS_FLUSH_INTERVAL
+# секунд переносятся в базу фоновым потоком каждого процесса сайта.
+# Кэш должен поддерживать атомарный incr и не вытеснять ответы до переноса
+# (отсюда большой MAX_ENTRIES). Буфер в локальной памяти у каждого процесса
+# свой: его переносит только поток, интервал должен быть больше 0. С общим
+# кэшем (Redis, Memcached) можно поставить 0 и запускать flush_word_stats
+# по расписанию.
+WORD_STATS_BUFFER = False
+WORD_STATS_BUFFER_CACHE = 'word_stats'
+WORD_STATS_FLUSH_INTERVAL = 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'word_stats': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'word-stats',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
@@ -62,6 +62,6 @@ class LetterSoupExerciseAdmin(admin.ModelAdmin):
     list_display = ('exercise', 'grid_size', 'words_count')
 
     def words_count(self, obj):
-        return len(obj.words)
+        return len(obj.get_words())
 
     words_count.short_description = 'Количество слов'
\ No newline at end of file
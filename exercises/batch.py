@@ -0,0 +1,83 @@
+# exercises/batch.py
+from django.db import transaction
+
+from vocabulary.stats import bump_student_versions
+from .models import Exercise, LetterSoupExercise
+from .utils import create_letter_soup_seeds, FILLER_FREQUENCY, LAYOUT_RANDOM
+
+
+def create_letter_soup_batch(teacher, students, words, grid_size, include_backwards=False,
+                             include_diagonals=False, layout=LAYOUT_RANDOM, description='',
+                             assignment_type='homework', due_date=None, workers=None,
+                             filler=FILLER_FREQUENCY):
+    """
+    Создает по отдельному буквенному супу для каждого ученика из одного списка слов.
+
+    Сетки генерируются параллельно (см. create_letter_soup_seeds), а все
+    упражнения записываются в одной транзакции через bulk_create.
+    bulk_create не посылает post_save, поэтому версии данных учеников
+    (кэш кабинетов) увеличиваются здесь же.
+
+    Args:
+        teacher: Учитель, создающий упражнения
+        students: Ученики
+        words: Объекты Word
+        grid_size: Размер сетки
+
+    Returns:
+        Список созданных Exercise
+
+    Raises:
+        PlacementError: если слова не помещаются в сетку
+    """
+    students = list(students)
+
+    pairs = []
+    for word in words:
+        pairs.append({
+            'word_id': word.id,
+            'russian': word.russian,
+            'english': word.english.lower()
+        })
+
+    seeds = create_letter_soup_seeds(
+        [pair['english'] for pair in pairs],
+        grid_size,
+        len(students),
+        include_backwards=include_backwards,
+        include_diagonals=include_diagonals,
+        workers=workers,
+        layout=layout,
+        filler=filler
+    )
+
+    with transaction.atomic():
+        exercises = Exercise.objects.bulk_create([
+            Exercise(
+                student=student,
+                teacher=teacher,
+                description=description,
+                assignment_type=assignment_type,
+                due_date=due_date,
+                exercise_type='letter_soup'
+            )
+            for student in students
+        ])
+
+        LetterSoupExercise.objects.bulk_create([
+            LetterSoupExercise(
+                exercise=exercise,
+                pairs=pairs,
+                seed=seed,
+                grid_size=grid_size,
+                include_backwards=include_backwards,
+                include_diagonals=include_diagonals,
+                layout=layout,
+                filler=filler
+            )
+            for exercise, seed in zip(exercises, seeds)
+        ])
+
+        bump_student_versions(student.pk for student in students)
+
+    return exercises
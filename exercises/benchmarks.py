@@ -0,0 +1,190 @@
+# exercises/benchmarks.py
+"""
+Бенчмарк генератора буквенного супа.
+
+Прогоняет calculate_grid_size и generate_letter_soup по матрице
+(размер сетки × количество слов) и собирает для каждой ячейки время,
+долю успешных размещений, счетчики перебора, плотность заполнения и
+пиковую память. Результаты сохраняются в JSON и могут сравниваться
+с сохраненным эталоном.
+"""
+import platform
+import random
+import string
+import time
+import tracemalloc
+from statistics import mean
+from typing import Dict, List, Optional
+
+from .utils import calculate_grid_size, covered_cells, generate_letter_soup, LAYOUT_RANDOM, PlacementError
+
+DEFAULT_GRID_SIZES = [8, 10, 12, 15, 20, 25]
+DEFAULT_WORD_COUNTS = [5, 10, 20, 30, 40, 50]
+
+# Распределение длин, если в словаре нет слов: типичная школьная лексика
+DEFAULT_WORD_LENGTHS = [3, 4, 4, 5, 5, 5, 6, 6, 6, 7, 7, 8, 8, 9, 10, 11]
+
+# Допустимое ухудшение относительно эталона
+DEFAULT_TOLERANCES = {
+    'generate_ms': 0.25,       # относительное замедление
+    'success_rate': 0.05,      # абсолютное падение доли успехов
+    'fill_density': 0.05,      # абсолютное падение плотности
+    'peak_memory_kb': 0.25,    # относительный рост памяти
+}
+
+# Разница во времени меньше этой считается шумом измерения
+TIME_NOISE_MS = 0.5
+
+
+def make_words(lengths: List[int], count: int, rng: random.Random) -> List[str]:
+    """Случайные слова с длинами из заданного распределения"""
+    return [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.choice(lengths)))
+        for _ in range(count)
+    ]
+
+
+def run_case(grid_size: int, word_count: int, lengths: List[int], runs: int, seed: int,
+             include_backwards: bool = False, include_diagonals: bool = False,
+             layout: str = LAYOUT_RANDOM) -> Dict:
+    """Прогоняет одну ячейку матрицы runs раз"""
+    lengths = [length for length in lengths if length <= grid_size] or [grid_size]
+    rng = random.Random(seed)
+
+    sizing_times = []
+    generate_times = []
+    steps = []
+    backtracks = []
+    densities = []
+    successes = 0
+    word_sets = []
+
+    for _ in range(runs):
+        words = make_words(lengths, word_count, rng)
+        word_sets.append(words)
+
+        started = time.perf_counter()
+        calculate_grid_size(words)
+        sizing_times.append(time.perf_counter() - started)
+
+        stats = {}
+        started = time.perf_counter()
+        try:
+            _, placed_words = generate_letter_soup(
+                words, grid_size, include_backwards, include_diagonals,
+                rng=random.Random(rng.random()), stats=stats, layout=layout
+            )
+        except PlacementError:
+            placed_words = None
+        generate_times.append(time.perf_counter() - started)
+
+        steps.append(stats.get('steps', 0))
+        backtracks.append(stats.get('backtracks', 0))
+        if placed_words is not None:
+            successes += 1
+            densities.append(covered_cells(placed_words) / grid_size ** 2)
+
+    # Память меряем отдельным проходом: tracemalloc искажает время
+    tracemalloc.start()
+    for words in word_sets:
+        try:
+            generate_letter_soup(words, grid_size, include_backwards, include_diagonals,
+                                 rng=random.Random(seed), layout=layout)
+        except PlacementError:
+            pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'grid_size': grid_size,
+        'word_count': word_count,
+        'runs': runs,
+        'sizing_ms': round(mean(sizing_times) * 1000, 4),
+        'generate_ms': round(mean(generate_times) * 1000, 3),
+        'success_rate': round(successes / runs, 3),
+        'avg_steps': round(mean(steps), 1),
+        'avg_backtracks': round(mean(backtracks), 1),
+        'fill_density': round(mean(densities), 3) if densities else 0.0,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmark(lengths: List[int], grid_sizes: Optional[List[int]] = None,
+                  word_counts: Optional[List[int]] = None, runs: int = 5, seed: int = 0,
+                  include_backwards: bool = False, include_diagonals: bool = False,
+                  layout: str = LAYOUT_RANDOM) -> Dict:
+    """
+    Прогоняет всю матрицу.
+
+    Returns:
+        Словарь {'meta': параметры запуска, 'results': [ячейки]},
+        пригодный для сохранения в JSON как эталон
+    """
+    grid_sizes = grid_sizes or DEFAULT_GRID_SIZES
+    word_counts = word_counts or DEFAULT_WORD_COUNTS
+
+    results = []
+    for grid_size in grid_sizes:
+        for word_count in word_counts:
+            results.append(run_case(
+                grid_size, word_count, lengths, runs,
+                seed=seed * 1000003 + grid_size * 1000 + word_count,
+                include_backwards=include_backwards,
+                include_diagonals=include_diagonals,
+                layout=layout
+            ))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'grid_sizes': grid_sizes,
+            'word_counts': word_counts,
+            'word_lengths': sorted(lengths),
+            'runs': runs,
+            'seed': seed,
+            'include_backwards': include_backwards,
+            'include_diagonals': include_diagonals,
+            'layout': layout,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, tolerances: Optional[Dict] = None) -> List[Dict]:
+    """
+    Сравнивает текущий прогон с эталоном.
+
+    Returns:
+        Список регрессий: {'grid_size', 'word_count', 'metric', 'baseline', 'current'}
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    baseline_cells = {
+        (cell['grid_size'], cell['word_count']): cell for cell in baseline['results']
+    }
+
+    regressions = []
+    for cell in current['results']:
+        base = baseline_cells.get((cell['grid_size'], cell['word_count']))
+        if base is None:
+            continue
+
+        checks = {
+            'generate_ms': (
+                cell['generate_ms'] > base['generate_ms'] * (1 + tolerances['generate_ms'])
+                and cell['generate_ms'] - base['generate_ms'] > TIME_NOISE_MS
+            ),
+            'success_rate': cell['success_rate'] < base['success_rate'] - tolerances['success_rate'],
+            'fill_density': cell['fill_density'] < base['fill_density'] - tolerances['fill_density'],
+            'peak_memory_kb': cell['peak_memory_kb'] > base['peak_memory_kb'] * (1 + tolerances['peak_memory_kb']),
+        }
+        for metric, regressed in checks.items():
+            if regressed:
+                regressions.append({
+                    'grid_size': cell['grid_size'],
+                    'word_count': cell['word_count'],
+                    'metric': metric,
+                    'baseline': base[metric],
+                    'current': cell[metric],
+                })
+
+    return regressions
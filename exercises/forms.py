@@ -3,7 +3,8 @@ from django import forms
 from .models import Exercise, LetterSoupExercise, DragDropExercise, SpellingExercise
 from users.models import User
 from vocabulary.models import Word
-from .utils import generate_letter_soup
+from .utils import calculate_grid_size, check_words_fit, create_letter_soup, PlacementError, LAYOUT_RANDOM
+from .batch import create_letter_soup_batch
 
 
 class BaseExerciseCreateForm(forms.ModelForm):
@@ -44,13 +45,72 @@ class LetterSoupExerciseForm(BaseExerciseCreateForm):
     grid_size = forms.IntegerField(
         min_value=8,
         max_value=25,
-        initial=15,
-        widget=forms.NumberInput(attrs={'class': 'form-control'}),
-        label='Размер сетки'
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Авто'}),
+        label='Размер сетки',
+        help_text='Оставьте пустым, чтобы подобрать наименьшую сетку, в которую помещаются слова'
+    )
+    include_backwards = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label='Включать обратное направление'
+    )
+    include_diagonals = forms.BooleanField(
+        required=False,
+        initial=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label='Включать диагональное направление'
+    )
+    layout = forms.ChoiceField(
+        choices=LetterSoupExercise.LAYOUT_CHOICES,
+        required=False,
+        initial=LAYOUT_RANDOM,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Раскладка',
+        help_text='Плотная раскладка сильнее переплетает слова и позволяет уместить их в меньшую сетку, '
+                  'но генерируется дольше'
     )
 
     class Meta(BaseExerciseCreateForm.Meta):
-        fields = BaseExerciseCreateForm.Meta.fields + ['grid_size']
+        fields = BaseExerciseCreateForm.Meta.fields + [
+            'grid_size', 'include_backwards', 'include_diagonals', 'layout'
+        ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        selected_word_ids = cleaned_data.get('word_selection', '').split(',')
+        selected_word_ids = [id.strip() for id in selected_word_ids if id.strip()]
+        self.selected_words = list(Word.objects.filter(id__in=selected_word_ids))
+
+        grid_size = cleaned_data.get('grid_size')
+        if not grid_size and self.selected_words and 'grid_size' not in self.errors:
+            grid_size = cleaned_data['grid_size'] = calculate_grid_size(
+                [word.english.lower() for word in self.selected_words],
+                adaptive=True,
+                include_backwards=cleaned_data.get('include_backwards', False),
+                include_diagonals=cleaned_data.get('include_diagonals', False),
+            )
+
+        if grid_size and self.selected_words:
+            # Генерируем сетку при валидации, чтобы сообщить учителю,
+            # если слова не помещаются, а не сохранять неполное упражнение
+            try:
+                self.seed, _ = create_letter_soup(
+                    [word.english.lower() for word in self.selected_words],
+                    grid_size=grid_size,
+                    include_backwards=cleaned_data.get('include_backwards', False),
+                    include_diagonals=cleaned_data.get('include_diagonals', False),
+                    layout=cleaned_data.get('layout') or LAYOUT_RANDOM,
+                )
+            except PlacementError as e:
+                self.add_error(
+                    'grid_size',
+                    f'{e}. Увеличьте размер сетки, разрешите больше направлений или выберите меньше слов.'
+                )
+
+        return cleaned_data
 
     def save(self, commit=True):
         exercise = super().save(commit=False)
@@ -62,33 +122,25 @@ class LetterSoupExerciseForm(BaseExerciseCreateForm):
         if commit:
             exercise.save()
 
-        selected_word_ids = self.cleaned_data.get('word_selection', '').split(',')
-        selected_word_ids = [id.strip() for id in selected_word_ids if id.strip()]
-
-        words = Word.objects.filter(id__in=selected_word_ids)
-
         # Сохраняем пары слов
         pairs = []
-        english_words = []
 
-        for word in words:
+        for word in self.selected_words:
             pairs.append({
+                'word_id': word.id,
                 'russian': word.russian,
                 'english': word.english.lower()
             })
-            english_words.append(word.english.lower())
-
-        grid_size = self.cleaned_data.get('grid_size', 15)
-
-        grid, placed_words = generate_letter_soup(english_words, grid_size=grid_size)
 
+        # Сетку не храним: она восстанавливается по парам, настройкам и зерну
         LetterSoupExercise.objects.create(
             exercise=exercise,
-            words=english_words,
             pairs=pairs,  # Сохраняем пары
-            grid=grid,
-            placed_words=placed_words,
-            grid_size=grid_size
+            seed=self.seed,
+            grid_size=self.cleaned_data['grid_size'],
+            include_backwards=self.cleaned_data.get('include_backwards', False),
+            include_diagonals=self.cleaned_data.get('include_diagonals', False),
+            layout=self.cleaned_data.get('layout') or LAYOUT_RANDOM
         )
 
         return exercise
@@ -180,3 +232,123 @@ class SpellingExerciseForm(BaseExerciseCreateForm):
         )
 
         return exercise
+
+
+class LetterSoupBatchForm(forms.Form):
+    """Форма для массового создания буквенных супов (своя сетка каждому ученику)"""
+
+    students = forms.ModelMultipleChoiceField(
+        queryset=User.objects.filter(role='student'),
+        widget=forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}),
+        label='Ученики',
+        error_messages={'required': 'Выберите хотя бы одного ученика'}
+    )
+    word_selection = forms.CharField(
+        widget=forms.HiddenInput(),
+        required=True,
+        error_messages={'required': 'Выберите хотя бы одно слово'}
+    )
+    description = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={
+            'class': 'form-control',
+            'rows': 3,
+            'placeholder': 'Например: Изучите эти слова'
+        }),
+        label='Описание'
+    )
+    assignment_type = forms.ChoiceField(
+        choices=Exercise.ASSIGNMENT_TYPE_CHOICES,
+        initial='homework',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Тип задания'
+    )
+    due_date = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={
+            'class': 'form-control',
+            'type': 'datetime-local'
+        }),
+        label='Срок выполнения'
+    )
+    grid_size = forms.IntegerField(
+        min_value=8,
+        max_value=25,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Авто'}),
+        label='Размер сетки',
+        help_text='Оставьте пустым, чтобы подобрать наименьшую сетку, в которую помещаются слова'
+    )
+    include_backwards = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label='Включать обратное направление'
+    )
+    include_diagonals = forms.BooleanField(
+        required=False,
+        initial=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label='Включать диагональное направление'
+    )
+    layout = forms.ChoiceField(
+        choices=LetterSoupExercise.LAYOUT_CHOICES,
+        required=False,
+        initial=LAYOUT_RANDOM,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label='Раскладка',
+        help_text='Плотная раскладка сильнее переплетает слова и позволяет уместить их в меньшую сетку, '
+                  'но генерируется дольше'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        selected_word_ids = cleaned_data.get('word_selection', '').split(',')
+        selected_word_ids = [id.strip() for id in selected_word_ids if id.strip()]
+        self.selected_words = list(Word.objects.filter(id__in=selected_word_ids))
+
+        grid_size = cleaned_data.get('grid_size')
+        if not grid_size and self.selected_words and 'grid_size' not in self.errors:
+            grid_size = cleaned_data['grid_size'] = calculate_grid_size(
+                [word.english.lower() for word in self.selected_words],
+                adaptive=True,
+                include_backwards=cleaned_data.get('include_backwards', False),
+                include_diagonals=cleaned_data.get('include_diagonals', False),
+            )
+
+        if grid_size and self.selected_words:
+            # Проверяем, что слова помещаются, до запуска генерации для всего класса
+            # (только размещение: сами сетки строит save)
+            try:
+                check_words_fit(
+                    [word.english.lower() for word in self.selected_words],
+                    grid_size=grid_size,
+                    include_backwards=cleaned_data.get('include_backwards', False),
+                    include_diagonals=cleaned_data.get('include_diagonals', False),
+                    layout=cleaned_data.get('layout') or LAYOUT_RANDOM,
+                )
+            except PlacementError as e:
+                self.add_placement_error(e)
+
+        return cleaned_data
+
+    def add_placement_error(self, error):
+        self.add_error(
+            'grid_size',
+            f'{error}. Увеличьте размер сетки, разрешите больше направлений или выберите меньше слов.'
+        )
+
+    def save(self, teacher):
+        return create_letter_soup_batch(
+            teacher,
+            self.cleaned_data['students'],
+            self.selected_words,
+            self.cleaned_data['grid_size'],
+            include_backwards=self.cleaned_data.get('include_backwards', False),
+            include_diagonals=self.cleaned_data.get('include_diagonals', False),
+            layout=self.cleaned_data.get('layout') or LAYOUT_RANDOM,
+            description=self.cleaned_data.get('description', ''),
+            assignment_type=self.cleaned_data['assignment_type'],
+            due_date=self.cleaned_data.get('due_date')
+        )
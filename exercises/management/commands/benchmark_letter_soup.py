@@ -0,0 +1,140 @@
+# exercises/management/commands/benchmark_letter_soup.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from vocabulary.models import Word
+from exercises.benchmarks import (
+    run_benchmark, compare, DEFAULT_GRID_SIZES, DEFAULT_WORD_COUNTS, DEFAULT_WORD_LENGTHS
+)
+from exercises.utils import LAYOUT_RANDOM, LAYOUT_DENSE
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк генератора буквенного супа: сохранение эталона и поиск регрессий'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Сохранить результаты в JSON файл (эталон)'
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            help='Сравнить с эталоном из JSON файла (параметры берутся из эталона)'
+        )
+        parser.add_argument(
+            '--grid-sizes',
+            type=int,
+            nargs='+',
+            default=DEFAULT_GRID_SIZES,
+            help='Размеры сетки'
+        )
+        parser.add_argument(
+            '--word-counts',
+            type=int,
+            nargs='+',
+            default=DEFAULT_WORD_COUNTS,
+            help='Количество слов'
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=5,
+            help='Повторов на ячейку (по умолчанию: 5)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора случайных чисел'
+        )
+        parser.add_argument(
+            '--backwards',
+            action='store_true',
+            help='Разрешить обратное направление слов'
+        )
+        parser.add_argument(
+            '--diagonals',
+            action='store_true',
+            help='Разрешить диагональное направление слов'
+        )
+        parser.add_argument(
+            '--layout',
+            choices=[LAYOUT_RANDOM, LAYOUT_DENSE],
+            default=LAYOUT_RANDOM,
+            help='Раскладка слов (по умолчанию: random)'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], 'r', encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise CommandError(f'Не удалось прочитать эталон: {e}')
+
+            meta = baseline['meta']
+            params = {
+                'lengths': meta['word_lengths'],
+                'grid_sizes': meta['grid_sizes'],
+                'word_counts': meta['word_counts'],
+                'runs': meta['runs'],
+                'seed': meta['seed'],
+                'include_backwards': meta['include_backwards'],
+                'include_diagonals': meta['include_diagonals'],
+                'layout': meta.get('layout', LAYOUT_RANDOM),
+            }
+        else:
+            params = {
+                'lengths': self.get_word_lengths(),
+                'grid_sizes': options['grid_sizes'],
+                'word_counts': options['word_counts'],
+                'runs': options['runs'],
+                'seed': options['seed'],
+                'include_backwards': options['backwards'],
+                'include_diagonals': options['diagonals'],
+                'layout': options['layout'],
+            }
+
+        result = run_benchmark(**params)
+        self.print_results(result)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Результаты сохранены: {options["output"]}'))
+
+        if baseline is not None:
+            regressions = compare(baseline, result)
+            if regressions:
+                self.stdout.write(self.style.ERROR(f'\nРегрессии: {len(regressions)}'))
+                for item in regressions:
+                    self.stdout.write(
+                        f"  {item['grid_size']:>3}×{item['grid_size']:<3} {item['word_count']:>3} слов  "
+                        f"{item['metric']}: {item['baseline']} → {item['current']}"
+                    )
+                raise CommandError('Обнаружены регрессии относительно эталона')
+            self.stdout.write(self.style.SUCCESS('\nРегрессий нет'))
+
+    def get_word_lengths(self):
+        """Распределение длин слов из словаря"""
+        lengths = [len(english) for english in Word.objects.values_list('english', flat=True) if english]
+        if not lengths:
+            self.stdout.write(self.style.WARNING('Словарь пуст, используется стандартное распределение длин'))
+            return DEFAULT_WORD_LENGTHS
+        return lengths
+
+    def print_results(self, result):
+        self.stdout.write(
+            f"{'Сетка':>7} {'Слов':>5} {'Размер, мс':>11} {'Генерация, мс':>14} {'Успех':>6} "
+            f"{'Шагов':>8} {'Возвратов':>10} {'Плотность':>10} {'Память, КБ':>11}"
+        )
+        self.stdout.write('-' * 90)
+        for cell in result['results']:
+            self.stdout.write(
+                f"{cell['grid_size']:>7} {cell['word_count']:>5} {cell['sizing_ms']:>11} "
+                f"{cell['generate_ms']:>14} {cell['success_rate']:>6} {cell['avg_steps']:>8} "
+                f"{cell['avg_backtracks']:>10} {cell['fill_density']:>10} {cell['peak_memory_kb']:>11}"
+            )
@@ -0,0 +1,144 @@
+# exercises/management/commands/generate_letter_soups.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+from vocabulary.models import Word
+from exercises.batch import create_letter_soup_batch
+from exercises.models import Exercise
+from exercises.utils import (
+    calculate_grid_size, PlacementError, LAYOUT_RANDOM, LAYOUT_DENSE, FILLER_FREQUENCY, FILLER_UNIFORM
+)
+
+
+class Command(BaseCommand):
+    help = 'Массовое создание буквенных супов: своя сетка для каждого ученика из одного списка слов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--teacher',
+            type=str,
+            required=True,
+            help='Логин учителя, от имени которого создаются упражнения'
+        )
+        parser.add_argument(
+            '--students',
+            nargs='+',
+            help='Логины учеников (по умолчанию — все ученики)'
+        )
+        parser.add_argument(
+            '--words',
+            nargs='+',
+            required=True,
+            help='Английские слова или ID слов из словаря'
+        )
+        parser.add_argument(
+            '--grid-size',
+            type=int,
+            help='Размер сетки 8-25 (по умолчанию — наименьшая сетка, в которую помещаются слова)'
+        )
+        parser.add_argument(
+            '--backwards',
+            action='store_true',
+            help='Разрешить обратное направление слов'
+        )
+        parser.add_argument(
+            '--diagonals',
+            action='store_true',
+            help='Разрешить диагональное направление слов'
+        )
+        parser.add_argument(
+            '--layout',
+            choices=[LAYOUT_RANDOM, LAYOUT_DENSE],
+            default=LAYOUT_RANDOM,
+            help='Раскладка слов: dense — больше пересечений (по умолчанию: random)'
+        )
+        parser.add_argument(
+            '--filler',
+            choices=[FILLER_FREQUENCY, FILLER_UNIFORM],
+            default=FILLER_FREQUENCY,
+            help='Заполнение пустых клеток: uniform — равновероятные буквы (по умолчанию: frequency)'
+        )
+        parser.add_argument(
+            '--description',
+            type=str,
+            default='',
+            help='Описание упражнения'
+        )
+        parser.add_argument(
+            '--assignment-type',
+            choices=[choice for choice, _ in Exercise.ASSIGNMENT_TYPE_CHOICES],
+            default='homework',
+            help='Тип задания (по умолчанию: homework)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Число процессов для генерации (по умолчанию — число ядер)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            teacher = User.objects.get(username=options['teacher'], role='teacher')
+        except User.DoesNotExist:
+            raise CommandError(f'Учитель не найден: {options["teacher"]}')
+
+        students = User.objects.filter(role='student').order_by('username')
+        if options['students']:
+            students = students.filter(username__in=options['students'])
+            missing = set(options['students']) - set(students.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f'Ученики не найдены: {", ".join(sorted(missing))}')
+        students = list(students)
+        if not students:
+            raise CommandError('Нет учеников')
+
+        words = self.get_words(options['words'])
+
+        grid_size = options['grid_size'] or calculate_grid_size(
+            [word.english for word in words],
+            adaptive=True,
+            include_backwards=options['backwards'],
+            include_diagonals=options['diagonals']
+        )
+        if not 8 <= grid_size <= 25:
+            raise CommandError('Размер сетки должен быть от 8 до 25')
+
+        self.stdout.write(
+            f'Учеников: {len(students)}, слов: {len(words)}, сетка {grid_size}×{grid_size}'
+        )
+
+        started = time.perf_counter()
+        try:
+            exercises = create_letter_soup_batch(
+                teacher,
+                students,
+                words,
+                grid_size,
+                include_backwards=options['backwards'],
+                include_diagonals=options['diagonals'],
+                layout=options['layout'],
+                filler=options['filler'],
+                description=options['description'],
+                assignment_type=options['assignment_type'],
+                workers=options['workers']
+            )
+        except PlacementError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано упражнений: {len(exercises)} за {time.perf_counter() - started:.2f} с'
+        ))
+
+    def get_words(self, values):
+        """Поиск слов по ID или английскому написанию"""
+        words = []
+        for value in values:
+            if value.isdigit():
+                word = Word.objects.filter(id=int(value)).first()
+            else:
+                word = Word.objects.filter(english=value.strip().lower()).first()
+            if word is None:
+                raise CommandError(f'Слово не найдено: {value}')
+            words.append(word)
+        return words
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0007_remove_dragdropexercise_shuffle_letters_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lettersoupexercise',
+            name='search_index',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Поисковый индекс'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0008_lettersoupexercise_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lettersoupexercise',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Зерно генерации'),
+        ),
+    ]
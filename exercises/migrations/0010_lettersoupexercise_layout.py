@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0009_lettersoupexercise_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lettersoupexercise',
+            name='layout',
+            field=models.CharField(choices=[('random', 'Случайная'), ('dense', 'Плотная (больше пересечений)')], default='random', max_length=10, verbose_name='Раскладка'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0010_lettersoupexercise_layout'),
+    ]
+
+    operations = [
+        # Существующие сетки созданы с равновероятными буквами
+        migrations.AddField(
+            model_name='lettersoupexercise',
+            name='filler',
+            field=models.CharField(choices=[('uniform', 'Равновероятные буквы'), ('frequency', 'По частоте букв')], default='uniform', max_length=10, verbose_name='Заполнение'),
+        ),
+        migrations.AlterField(
+            model_name='lettersoupexercise',
+            name='filler',
+            field=models.CharField(choices=[('uniform', 'Равновероятные буквы'), ('frequency', 'По частоте букв')], default='frequency', max_length=10, verbose_name='Заполнение'),
+        ),
+    ]
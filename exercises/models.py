@@ -4,6 +4,10 @@ from django.utils import timezone
 
 import json
 
+from .utils import (
+    build_search_index, regenerate_letter_soup, LAYOUT_RANDOM, LAYOUT_DENSE, FILLER_UNIFORM, FILLER_FREQUENCY
+)
+
 
 # exercises/models.py
 from django.db import models
@@ -159,6 +163,15 @@ class LetterSoupExercise(models.Model):
         primary_key=True
     )
 
+    LAYOUT_CHOICES = [
+        (LAYOUT_RANDOM, 'Случайная'),
+        (LAYOUT_DENSE, 'Плотная (больше пересечений)'),
+    ]
+    FILLER_CHOICES = [
+        (FILLER_UNIFORM, 'Равновероятные буквы'),
+        (FILLER_FREQUENCY, 'По частоте букв'),
+    ]
+
     type = 'Буквенный суп'
     # Слова для поиска
     words = models.JSONField('Слова для поиска', default=list)
@@ -172,10 +185,32 @@ class LetterSoupExercise(models.Model):
     # Информация о размещенных словах
     placed_words = models.JSONField('Размещенные слова', default=list)
 
+    # Все вхождения слов в сетку: {СЛОВО: [[row1, col1, row2, col2], ...]}
+    search_index = models.JSONField('Поисковый индекс', default=dict, blank=True)
+
+    # Компактное хранение: если задано зерно, сетка, размещенные слова и
+    # индекс не хранятся, а восстанавливаются по словам, настройкам и зерну.
+    # Упражнения, созданные до появления зерна, остаются в сохраненном виде
+    seed = models.BigIntegerField('Зерно генерации', null=True, blank=True)
+
     # Настройки сетки
     grid_size = models.IntegerField('Размер сетки', default=15)
     include_backwards = models.BooleanField('Включать обратное направление', default=True)
     include_diagonals = models.BooleanField('Включать диагонали', default=False)
+    layout = models.CharField(
+        'Раскладка',
+        max_length=10,
+        choices=LAYOUT_CHOICES,
+        default=LAYOUT_RANDOM
+    )
+    # Способ заполнения пустых клеток; нужен, чтобы старые сетки
+    # восстанавливались по зерну в прежнем виде
+    filler = models.CharField(
+        'Заполнение',
+        max_length=10,
+        choices=FILLER_CHOICES,
+        default=FILLER_FREQUENCY
+    )
 
     class Meta:
         verbose_name = 'Letter Soup упражнение'
@@ -184,6 +219,43 @@ class LetterSoupExercise(models.Model):
     def __str__(self):
         return f"Letter Soup - {self.exercise.student}"
 
+    @property
+    def is_compact(self):
+        return self.seed is not None
+
+    def get_words(self):
+        """Английские слова упражнения в порядке создания"""
+        return [pair['english'] for pair in self.pairs if pair.get('english')] or self.words
+
+    def get_search_index(self):
+        """Поисковый индекс сетки (строится при первом обращении для старых упражнений)"""
+        if self.is_compact:
+            return self.get_layout()[2]
+        if not self.search_index and self.grid:
+            self.search_index = build_search_index(self.grid, self.get_words(), self.include_diagonals)
+            if self.pk:
+                self.save(update_fields=['search_index'])
+        return self.search_index
+
+    def get_layout(self):
+        """
+        Возвращает (grid, placed_words, search_index).
+
+        В компактном режиме сетка восстанавливается по зерну; результат
+        кэшируется, поэтому возвращаемые данные нельзя изменять.
+        """
+        if self.is_compact:
+            return regenerate_letter_soup(
+                tuple(self.get_words()),
+                self.grid_size,
+                self.include_backwards,
+                self.include_diagonals,
+                self.seed,
+                self.layout,
+                self.filler
+            )
+        return self.grid, self.placed_words, self.get_search_index()
+
 
 # Добавить в models.py после DragDropExercise
 
@@ -0,0 +1,342 @@
+import os
+import random
+import string
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users.models import User
+from vocabulary import buffer as word_stats_buffer
+from vocabulary.models import StudentStats, StudentWord, Word, WordAttempt
+from . import utils
+from .batch import create_letter_soup_batch
+from .forms import LetterSoupBatchForm
+from .models import DragDropExercise, Exercise, LetterSoupExercise, SpellingExercise
+from .verification import record_attempts
+
+
+class TeacherExercisesListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pass', role='teacher')
+        cls.other_teacher = User.objects.create_user('other', password='pass', role='teacher')
+        cls.students = [cls.create_student(i) for i in range(3)]
+
+    @classmethod
+    def create_student(cls, i):
+        student = User.objects.create_user(f'student{i}', password='pass', role='student')
+        for status, model, exercise_type in (
+            ('completed', SpellingExercise, 'spelling'),
+            ('graded', DragDropExercise, 'drag_drop'),
+            ('not_started', LetterSoupExercise, 'letter_soup'),
+        ):
+            exercise = Exercise.objects.create(
+                student=student, teacher=cls.teacher, status=status, exercise_type=exercise_type
+            )
+            model.objects.create(exercise=exercise)
+        Exercise.objects.create(student=student, teacher=cls.other_teacher, status='completed')
+        return student
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def test_query_count_does_not_depend_on_students(self):
+        # сессия, пользователь, упражнения, три типа упражнений, ученики со счетчиками
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('exercises:teacher_exercises'))
+        self.assertEqual(response.status_code, 200)
+
+        for i in range(3, 8):
+            self.create_student(i)
+
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('exercises:teacher_exercises'))
+        self.assertEqual(len(response.context['students_with_exercises']), 8)
+
+        for exercise in response.context['exercises']:
+            with self.assertNumQueries(0):
+                exercise.get_concrete_exercise()
+
+    def test_student_counts(self):
+        response = self.client.get(reverse('exercises:teacher_exercises'))
+        items = {item['student'].username: item for item in response.context['students_with_exercises']}
+
+        self.assertEqual(items['student0']['count'], 3)
+        self.assertEqual(items['student0']['completed'], 1)
+        self.assertEqual(items['student0']['graded'], 1)
+        self.assertEqual(len(items['student0']['exercises']), 3)
+        self.assertTrue(all(exercise.teacher_id == self.teacher.id for exercise in items['student0']['exercises']))
+
+    def test_single_student(self):
+        student = self.students[1]
+        # сессия, пользователь, ученик, упражнения, три типа упражнений
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('exercises:teacher_exercises_for_student', args=[student.id]))
+        self.assertEqual(len(response.context['exercises']), 3)
+        self.assertEqual(response.context['student'], student)
+
+
+class LetterSoupBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pass', role='teacher')
+        cls.students = [User.objects.create_user(f'student{i}', password='pass', role='student') for i in range(3)]
+        cls.words = [Word.objects.create(russian=russian, english=english)
+                     for russian, english in (('кот', 'cat'), ('собака', 'dog'), ('луна', 'moon'))]
+
+    def form(self, **data):
+        return LetterSoupBatchForm({
+            'students': [student.pk for student in self.students],
+            'word_selection': ','.join(str(word.pk) for word in self.words),
+            'assignment_type': 'homework',
+            **data,
+        })
+
+    def test_batch_bumps_student_versions(self):
+        # bulk_create не посылает post_save: кэш кабинетов сбрасывается явно
+        before = dict(StudentStats.objects.values_list('student_id', 'version'))
+
+        exercises = create_letter_soup_batch(self.teacher, self.students, self.words, 8, workers=1)
+
+        self.assertEqual(len(exercises), 3)
+        after = dict(StudentStats.objects.values_list('student_id', 'version'))
+        for student in self.students:
+            self.assertGreater(after[student.pk], before.get(student.pk, 0))
+
+    def test_seeds_use_filler(self):
+        with mock.patch.object(utils, 'create_letter_soup', wraps=utils.create_letter_soup) as create:
+            exercises = create_letter_soup_batch(
+                self.teacher, self.students, self.words, 8, workers=1, filler=utils.FILLER_UNIFORM
+            )
+
+        self.assertEqual(create.call_count, 3)
+        self.assertTrue(all(call.kwargs['filler'] == utils.FILLER_UNIFORM for call in create.call_args_list))
+        self.assertEqual(exercises[0].lettersoupexercise.filler, utils.FILLER_UNIFORM)
+
+    def test_form_checks_placement_without_generating(self):
+        with mock.patch('exercises.forms.create_letter_soup') as create:
+            self.assertTrue(self.form(grid_size=8, layout=utils.LAYOUT_DENSE).is_valid())
+        create.assert_not_called()
+
+    def test_form_rejects_words_longer_than_grid(self):
+        word = Word.objects.create(russian='достопримечательность', english='sightseeingspot')
+        form = self.form(grid_size=8, word_selection=f'{self.words[0].pk},{word.pk}')
+        self.assertFalse(form.is_valid())
+        self.assertIn('grid_size', form.errors)
+
+
+
+class LetterSoupVerifyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.words = [Word.objects.create(russian=russian, english=english)
+                     for russian, english in (('кот', 'cat'), ('собака', 'dog'))]
+        for word in cls.words:
+            StudentWord.objects.create(student=cls.student, word=word)
+        cls.exercise = create_letter_soup_batch(cls.teacher, [cls.student], cls.words, 8, workers=1)[0]
+
+    def setUp(self):
+        self.client.force_login(self.student)
+        spans = self.exercise.lettersoupexercise.get_search_index()
+        self.spans = {word.english.upper(): spans[word.english.upper()][0] for word in self.words}
+
+    def verify(self, selections, complete=False):
+        return self.client.post(
+            reverse('exercises:verify_letter_soup', args=[self.exercise.pk]),
+            {'selections': selections, 'complete': complete},
+            content_type='application/json'
+        ).json()
+
+    def counters(self, word):
+        return StudentWord.objects.filter(word=word).values_list('times_attempted', 'times_correct', 'times_wrong').get()
+
+    def test_page_has_no_answer_key(self):
+        response = self.client.get(reverse('exercises:do_exercise', args=[self.exercise.pk]))
+        self.assertNotIn('placed_words', response.context)
+        self.assertNotIn('search_index', response.context)
+
+    def test_wrong_selection_is_recorded(self):
+        row1, col1, row2, col2 = self.spans['CAT']
+        data = self.verify([
+            {'word': 'cat', 'span': [row1, col1, row2 + 1, col2 + 1], 'response_time': 900},
+            {'word': 'cat', 'span': self.spans['CAT'], 'response_time': 900},
+        ])
+        self.assertEqual([result['correct'] for result in data['results']], [False, True])
+        # Слово учитывается по первому выделению
+        self.assertEqual(self.counters(self.words[0]), (1, 0, 1))
+
+    def test_repeated_request_does_not_count_twice(self):
+        selections = [{'word': word, 'span': span, 'response_time': 900} for word, span in self.spans.items()]
+        self.verify(selections)
+        data = self.verify(selections)
+        self.assertEqual(data['correct'], 2)
+        for word in self.words:
+            self.assertEqual(self.counters(word), (1, 1, 0))
+        self.assertEqual(WordAttempt.objects.filter(exercise=self.exercise).count(), 2)
+
+# Печатает сетки и индексы для нескольких зерен (запускается в отдельном процессе)
+REGENERATE_SCRIPT = """
+import json
+from exercises.utils import PlacementError, regenerate_letter_soup
+words = ('cat', 'tac', 'tea', 'eat', 'level', 'noon', 'stats', 'ten', 'net')
+result = []
+for seed in range(150):
+    try:
+        grid, _, index = regenerate_letter_soup(words, 9, True, True, seed)
+    except PlacementError:
+        result.append(None)
+    else:
+        result.append([''.join(map(''.join, grid)), index])
+print(json.dumps(result, sort_keys=True))
+"""
+
+
+class LetterSoupSeedTests(SimpleTestCase):
+    def regenerate(self, hash_seed):
+        return subprocess.run(
+            [sys.executable, '-c', REGENERATE_SCRIPT],
+            cwd=settings.BASE_DIR, env={**os.environ, 'PYTHONHASHSEED': hash_seed},
+            capture_output=True, text=True, check=True,
+        ).stdout
+
+    def test_seed_regenerates_same_grid_in_any_process(self):
+        # Сетка восстанавливается по зерну в других процессах,
+        # поэтому не должна зависеть от порядка обхода множеств
+        self.assertEqual(self.regenerate('1'), self.regenerate('2'))
+
+
+def random_words(rng, count, min_length=3, max_length=10):
+    words = set()
+    while len(words) < count:
+        length = rng.randint(min_length, max_length)
+        words.add(''.join(rng.choice(string.ascii_uppercase) for _ in range(length)))
+    return sorted(words)
+
+
+class LetterSoupPlacementTests(SimpleTestCase):
+    def assert_all_placed(self, words, grid, placed_words, directions):
+        self.assertCountEqual([placed['word'] for placed in placed_words], words)
+        for placed in placed_words:
+            self.assertIn(placed['direction'], directions)
+            d_row, d_col = utils.DIRECTIONS[placed['direction']]
+            letters = ''.join(
+                grid[placed['row'] + d_row * i][placed['col'] + d_col * i]
+                for i in range(placed['length'])
+            )
+            self.assertEqual(letters, placed['word'])
+
+    def test_every_word_is_placed_in_allowed_directions(self):
+        rng = random.Random(1)
+        for include_backwards in (False, True):
+            for include_diagonals in (False, True):
+                directions = utils.get_directions(include_backwards, include_diagonals)
+                for layout in (utils.LAYOUT_RANDOM, utils.LAYOUT_DENSE):
+                    with self.subTest(backwards=include_backwards, diagonals=include_diagonals, layout=layout):
+                        words = random_words(rng, 12)
+                        grid, placed_words = utils.generate_letter_soup(
+                            words, 15, include_backwards, include_diagonals,
+                            rng=random.Random(2), layout=layout
+                        )
+                        self.assert_all_placed(words, grid, placed_words, directions)
+
+    def test_many_words_fill_largest_grid_quickly(self):
+        rng = random.Random(3)
+        for count in (40, 50):
+            with self.subTest(count=count):
+                words = random_words(rng, count)
+                stats = {}
+                started = time.perf_counter()
+                grid, placed_words = utils.generate_letter_soup(
+                    words, utils.MAX_GRID_SIZE, True, True, rng=random.Random(4), stats=stats
+                )
+                elapsed = time.perf_counter() - started
+                self.assert_all_placed(words, grid, placed_words, utils.DIRECTIONS)
+                self.assertLess(stats['steps'], utils.MAX_PLACEMENT_STEPS)
+                # Вручную это около 50 мс; запас на медленные машины CI
+                self.assertLess(elapsed, 1)
+
+    def test_word_longer_than_grid_is_rejected(self):
+        with self.assertRaises(utils.PlacementError) as caught:
+            utils.generate_letter_soup(['cat', 'abcdefghi'], utils.MIN_GRID_SIZE)
+        self.assertEqual(caught.exception.unplaced, ['ABCDEFGHI'])
+        self.assertEqual(caught.exception.steps, 0)
+
+    def test_impossible_words_fail_at_step_limit(self):
+        # Девять слов без общих букв по 8 клеток не помещаются в 64 клетки
+        words = [letter * utils.MIN_GRID_SIZE for letter in 'ABCDEFGHI']
+        for include_diagonals in (False, True):
+            with self.subTest(diagonals=include_diagonals):
+                stats = {}
+                started = time.perf_counter()
+                with self.assertRaises(utils.PlacementError) as caught:
+                    utils.generate_letter_soup(
+                        words, utils.MIN_GRID_SIZE, True, include_diagonals,
+                        rng=random.Random(5), stats=stats
+                    )
+                elapsed = time.perf_counter() - started
+                self.assertEqual(caught.exception.steps, utils.MAX_PLACEMENT_STEPS + 1)
+                self.assertEqual(stats['steps'], caught.exception.steps)
+                self.assertTrue(caught.exception.unplaced)
+                self.assertLess(elapsed, 1)
+
+
+class RecordAttemptsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.word = Word.objects.create(russian='кот', english='cat')
+        cls.student_word = StudentWord.objects.create(student=cls.student, word=cls.word)
+        cls.exercise = Exercise.objects.create(student=cls.student, teacher=cls.teacher, exercise_type='spelling')
+
+    def test_concurrent_answers_are_not_lost(self):
+        # Другой запрос отвечает на то же слово между чтением слов пачки и их обновлением
+        create = WordAttempt.objects.bulk_create
+
+        def answer_meanwhile(attempts):
+            StudentWord.objects.get(pk=self.student_word.pk).record_attempt(is_correct=False)
+            return create(attempts)
+
+        with mock.patch.object(WordAttempt.objects, 'bulk_create', side_effect=answer_meanwhile):
+            record_attempts(
+                self.exercise,
+                Q(word=self.word),
+                {self.word.pk: [(True, 1000), (True, 1000)]},
+                key=lambda student_word: student_word.word_id
+            )
+
+        student_word = StudentWord.objects.get(pk=self.student_word.pk)
+        self.assertEqual(
+            (student_word.times_attempted, student_word.times_correct, student_word.times_wrong), (3, 2, 1)
+        )
+        self.assertEqual(StudentStats.objects.get(student=self.student).attempts, 3)
+
+    @override_settings(WORD_STATS_BUFFER=True)
+    def test_buffered_answers_are_applied_on_flush(self):
+        word_stats_buffer.get_cache().clear()
+        self.addCleanup(word_stats_buffer.get_cache().clear)
+
+        record_attempts(
+            self.exercise,
+            Q(word=self.word),
+            {self.word.pk: [(True, 1000), (False, 2000)]},
+            key=lambda student_word: student_word.word_id
+        )
+        self.assertFalse(WordAttempt.objects.exists())
+        self.assertEqual(StudentWord.objects.get(pk=self.student_word.pk).times_attempted, 0)
+
+        self.assertEqual(word_stats_buffer.flush_word_stats(), 2)
+        student_word = StudentWord.objects.get(pk=self.student_word.pk)
+        self.assertEqual(
+            (student_word.times_attempted, student_word.times_correct, student_word.times_wrong), (2, 1, 1)
+        )
+        self.assertEqual(student_word.last_attempt_id, WordAttempt.objects.latest('id').id)
+        self.assertEqual(StudentStats.objects.get(student=self.student).attempts, 2)
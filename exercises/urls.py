@@ -16,6 +16,7 @@ urlpatterns = [
     path('create/drag_drop/<int:student_id>/', views.create_drag_drop, name='create_drag_drop_for_student'),
     path('create/letter_soup/', views.create_letter_soup, name='create_letter_soup'),
     path('create/letter_soup/<int:student_id>/', views.create_letter_soup, name='create_letter_soup_for_student'),
+    path('create/letter_soup/batch/', views.create_letter_soup_batch, name='create_letter_soup_batch'),
 
     # Добавляем новые общие URL (опционально, можно редирект на select_type)
     path('create/', views.select_exercise_type, name='create_exercise'),
@@ -32,9 +33,11 @@ urlpatterns = [
     # Выполнение упражнений
     path('do/<int:exercise_id>/', views.do_exercise, name='do_exercise'),
     path('complete/<int:exercise_id>/', views.complete_exercise, name='complete_exercise'),
+    path('letter_soup/verify/<int:exercise_id>/', views.verify_letter_soup_selections, name='verify_letter_soup'),
 
     # Действия с упражнением
     path('delete/<int:exercise_id>/', views.delete_exercise, name='delete_exercise'),
     path('update_status/<int:exercise_id>/', views.update_exercise_status, name='update_exercise_status'),
     path('update_word_stat/<int:exercise_id>/', views.update_word_stat, name='update_word_stat'),
+    path('update_word_stats/<int:exercise_id>/', views.update_word_stats_batch, name='update_word_stats_batch'),
 ]
@@ -1,18 +1,41 @@
+import math
+import os
 import random
 import string
-from typing import List, Tuple, Dict, Set
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Tuple, Dict, Set, Optional
 
 
-def calculate_grid_size(words: List[str]) -> int:
+MIN_GRID_SIZE = 8
+MAX_GRID_SIZE = 25
+
+# Доля клеток, которую могут занимать слова при автоподборе размера сетки
+TARGET_DENSITY = 0.5
+
+
+def calculate_grid_size(words: List[str], adaptive: bool = False, include_backwards: bool = False,
+                        include_diagonals: bool = False, target_density: float = TARGET_DENSITY) -> int:
     """
     Автоматически рассчитывает оптимальный размер сетки на основе слов.
 
     Args:
         words: Список английских слов
+        adaptive: Подобрать наименьшую сетку, в которую слова действительно
+            помещаются (см. find_min_grid_size), вместо оценки по порогам
+        include_backwards: Разрешить обратное направление (для adaptive)
+        include_diagonals: Разрешить диагонали (для adaptive)
+        target_density: Допустимая доля клеток, занятых словами (для adaptive)
 
     Returns:
         int: Оптимальный размер сетки
     """
+    if adaptive:
+        return find_min_grid_size(words, include_backwards, include_diagonals, target_density)
+
     if not words:
         return 10  # минимальный размер по умолчанию
 
@@ -38,8 +61,8 @@ def calculate_grid_size(words: List[str]) -> int:
         base_size = int(base_size * 1.2)
 
     # Ограничиваем диапазоном
-    min_size = 8
-    max_size = 25
+    min_size = MIN_GRID_SIZE
+    max_size = MAX_GRID_SIZE
 
     # Особые случаи
     if max_word_length > 15:
@@ -53,171 +76,744 @@ def calculate_grid_size(words: List[str]) -> int:
     # Применяем ограничения
     return max(min_size, min(base_size, max_size))
 
-def generate_letter_soup(words: List[str], grid_size = None) -> Tuple[List[List[str]], List[Dict]]:
+
+def find_min_grid_size(words: List[str], include_backwards: bool = False, include_diagonals: bool = False,
+                       target_density: float = TARGET_DENSITY) -> int:
+    """
+    Наименьший размер сетки (от MIN_GRID_SIZE до MAX_GRID_SIZE), в который
+    слова помещаются и при котором слова занимают не больше target_density
+    клеток.
+
+    Проверка размещения не учитывает общие буквы: если слова помещаются
+    без пересечений, то с пересечениями поместятся тем более. Поэтому
+    результат зависит только от набора длин слов и кэшируется по нему.
+
+    Returns:
+        int: Размер сетки (MAX_GRID_SIZE, если слова не помещаются и в нее)
+    """
+    lengths = tuple(sorted(len(word) for word in set(word.upper() for word in words)))
+    return _min_grid_size_for_lengths(lengths, include_backwards, include_diagonals, target_density)
+
+
+@lru_cache(maxsize=1024)
+def _min_grid_size_for_lengths(lengths: Tuple[int, ...], include_backwards: bool, include_diagonals: bool,
+                               target_density: float) -> int:
+    if not lengths:
+        return MIN_GRID_SIZE
+
+    total_letters = sum(lengths)
+    size = max(MIN_GRID_SIZE, lengths[-1], math.ceil(math.sqrt(total_letters / target_density)))
+
+    # Каждое слово из своей собственной буквы — так слова не могут пересекаться
+    placeholders = [chr(0xE000 + i) * length for i, length in enumerate(lengths)]
+    directions = get_directions(include_backwards, include_diagonals)
+
+    while size < MAX_GRID_SIZE:
+        try:
+            _place_words(placeholders, size, directions, random.Random(size), MAX_PLACEMENT_STEPS)
+            return size
+        except PlacementError:
+            size += 1
+
+    return MAX_GRID_SIZE
+
+
+# Направления: название -> (смещение по строке, смещение по столбцу)
+DIRECTIONS = {
+    'horizontal': (0, 1),
+    'vertical': (1, 0),
+    'diagonal': (1, 1),
+    'diagonal_up': (-1, 1),
+    'horizontal_reverse': (0, -1),
+    'vertical_reverse': (-1, 0),
+    'diagonal_reverse': (-1, -1),
+    'diagonal_up_reverse': (1, -1),
+}
+
+# Ограничение перебора: сколько позиций-кандидатов можно проверить
+# при размещении одного набора слов, прежде чем сдаться
+MAX_PLACEMENT_STEPS = 50000
+
+# Сколько зерен перебрать, если слово случайно встретилось в сетке дважды
+MAX_REGENERATE_ATTEMPTS = 5
+
+# Раскладки: random — слова пересекаются лишь случайно,
+# dense — позиции с общими буквами пробуются первыми
+LAYOUT_RANDOM = 'random'
+LAYOUT_DENSE = 'dense'
+
+# Сколько секунд искать самую плотную раскладку в режиме dense
+DENSE_TIME_BUDGET = 0.5
+
+# Заполнение пустых клеток: uniform — равновероятные буквы (так созданы
+# старые сетки), frequency — по частоте букв в английских текстах
+# с устранением случайных вхождений искомых слов
+FILLER_UNIFORM = 'uniform'
+FILLER_FREQUENCY = 'frequency'
+
+# Частоты букв английского языка, %
+LETTER_FREQUENCIES = {
+    'E': 12.7, 'T': 9.1, 'A': 8.2, 'O': 7.5, 'I': 7.0, 'N': 6.7, 'S': 6.3,
+    'H': 6.1, 'R': 6.0, 'D': 4.3, 'L': 4.0, 'C': 2.8, 'U': 2.8, 'M': 2.4,
+    'W': 2.4, 'F': 2.2, 'G': 2.0, 'Y': 2.0, 'P': 1.9, 'B': 1.5, 'V': 1.0,
+    'K': 0.8, 'J': 0.15, 'X': 0.15, 'Q': 0.1, 'Z': 0.07,
+}
+FILLER_LETTERS = tuple(LETTER_FREQUENCIES)
+FILLER_CUM_WEIGHTS = tuple(accumulate(LETTER_FREQUENCIES.values()))
+
+# Сколько раз перепроверять сетку после замены букв-заполнителей
+MAX_REPAIR_ROUNDS = 10
+
+
+class PlacementError(Exception):
+    """
+    Не удалось разместить все слова в сетке.
+
+    Attributes:
+        unplaced: Слова, которые не удалось разместить (в верхнем регистре)
+        grid_size: Размер сетки, для которой выполнялось размещение
+        steps: Сколько позиций было проверено до отказа
+    """
+
+    def __init__(self, unplaced: List[str], grid_size: int, steps: int = 0):
+        self.unplaced = list(unplaced)
+        self.grid_size = grid_size
+        self.steps = steps
+        super().__init__(
+            f"Не удалось разместить слова в сетке {grid_size}×{grid_size}: "
+            f"{', '.join(self.unplaced)}"
+        )
+
+
+def get_directions(include_backwards: bool = False, include_diagonals: bool = False) -> Tuple[str, ...]:
+    """
+    Возвращает разрешенные направления размещения слов.
+
+    Args:
+        include_backwards: Разрешить слова справа налево и снизу вверх
+        include_diagonals: Разрешить диагональные слова
+
+    Returns:
+        Кортеж названий направлений (ключей DIRECTIONS)
+    """
+    directions = ['horizontal', 'vertical']
+    if include_diagonals:
+        directions += ['diagonal', 'diagonal_up']
+    if include_backwards:
+        directions += [f'{direction}_reverse' for direction in directions]
+    return tuple(directions)
+
+
+@lru_cache(maxsize=1024)
+def _candidate_positions(length: int, grid_size: int, directions: Tuple[str, ...]) -> Tuple[Tuple[int, int, str], ...]:
+    """
+    Все позиции, куда помещается слово заданной длины.
+
+    Позиция задается индексом первой буквы в плоской сетке и шагом
+    между соседними буквами: (start, step, direction).
+    """
+    last = length - 1
+    positions = []
+    for direction in directions:
+        dr, dc = DIRECTIONS[direction]
+        step = dr * grid_size + dc
+        for row in range(grid_size):
+            if not 0 <= row + dr * last < grid_size:
+                continue
+            for col in range(grid_size):
+                if 0 <= col + dc * last < grid_size:
+                    positions.append((row * grid_size + col, step, direction))
+    return tuple(positions)
+
+
+def _crossing_positions(word: str, grid_size: int, directions: Tuple[str, ...],
+                        cells: List[str], letter_cells: Dict[str, Set[int]]) -> List[Tuple[int, int, str]]:
+    """
+    Позиции слова, пересекающие уже размещенные слова, от большего
+    числа общих букв к меньшему.
+
+    Позиции строятся от клеток с совпадающими буквами, а не перебором
+    всей сетки. Позиции, целиком лежащие внутри других слов, пропускаются:
+    такое слово не было бы видно как отдельное.
+    """
+    length = len(word)
+    scored = {}
+    for offset, letter in enumerate(word):
+        for cell_index in letter_cells.get(letter, ()):
+            row, col = divmod(cell_index, grid_size)
+            for direction in directions:
+                dr, dc = DIRECTIONS[direction]
+                start_row, start_col = row - dr * offset, col - dc * offset
+                end_row, end_col = start_row + dr * (length - 1), start_col + dc * (length - 1)
+                if not (0 <= start_row < grid_size and 0 <= start_col < grid_size
+                        and 0 <= end_row < grid_size and 0 <= end_col < grid_size):
+                    continue
+                start = start_row * grid_size + start_col
+                position = (start, dr * grid_size + dc, direction)
+                if position in scored:
+                    continue
+
+                shared = 0
+                index = start
+                for char in word:
+                    cell = cells[index]
+                    if cell:
+                        if cell != char:
+                            shared = 0
+                            break
+                        shared += 1
+                    index += position[1]
+                scored[position] = shared if shared < length else 0
+
+    return sorted((position for position, shared in scored.items() if shared),
+                  key=scored.get, reverse=True)
+
+
+def _place_words(words: List[str], grid_size: int, directions: Tuple[str, ...],
+                 rng: random.Random, max_steps: int, stats: Optional[Dict] = None,
+                 dense: bool = False) -> Tuple[List[str], List[Dict]]:
+    """
+    Размещает слова в плоской сетке перебором с возвратом.
+
+    Слова обрабатываются от длинных к коротким. Для каждого слова
+    перебираются заранее вычисленные позиции в случайном порядке; если
+    очередное слово никуда не помещается, снимается предыдущее и для
+    него пробуется следующая позиция.
+
+    При dense=True сначала пробуются позиции, пересекающие уже
+    размещенные слова (больше общих букв — раньше), а затем остальные.
+
+    Если передан словарь stats, в него записываются счетчики перебора:
+    steps (проверено позиций) и backtracks (сколько раз снималось слово).
+
+    Returns:
+        Tuple[cells, placed_words]: плоская сетка (пустые клетки — '')
+        и информация о размещенных словах
+
+    Raises:
+        PlacementError: если слова не помещаются или исчерпан лимит max_steps
+    """
+    cells = [''] * (grid_size * grid_size)
+    order = sorted(words, key=len, reverse=True)
+
+    shuffled = []
+    for word in order:
+        positions = list(_candidate_positions(len(word), grid_size, directions))
+        if not positions:
+            raise PlacementError([w for w in order if len(w) > grid_size], grid_size)
+        rng.shuffle(positions)
+        shuffled.append(positions)
+
+    # В режиме dense порядок позиций зависит от уже размещенных слов,
+    # поэтому строится при переходе к слову, а не заранее
+    candidates = list(shuffled)
+    letter_cells = defaultdict(set)
+
+    count = len(order)
+    cursor = [0] * count      # следующая непроверенная позиция для каждого слова
+    chosen = [None] * count   # выбранная позиция для размещенных слов
+    written = [None] * count  # клетки, которые заполнило именно это слово
+    depth = 0
+    best_depth = 0
+    steps = 0
+    backtracks = 0
+    if stats is None:
+        stats = {}
+
+    while depth < count:
+        word = order[depth]
+        i = cursor[depth]
+        if dense and i == 0:
+            candidates[depth] = _crossing_positions(
+                word, grid_size, directions, cells, letter_cells
+            ) + shuffled[depth]
+        positions = candidates[depth]
+        placed = False
+
+        while i < len(positions):
+            steps += 1
+            if steps > max_steps:
+                stats.update(steps=steps, backtracks=backtracks)
+                raise PlacementError(order[best_depth:], grid_size, steps)
+
+            start, step, direction = positions[i]
+            i += 1
+
+            index = start
+            for letter in word:
+                cell = cells[index]
+                if cell and cell != letter:
+                    break
+                index += step
+            else:
+                filled = []
+                index = start
+                for letter in word:
+                    if not cells[index]:
+                        cells[index] = letter
+                        filled.append(index)
+                        if dense:
+                            letter_cells[letter].add(index)
+                    index += step
+                chosen[depth] = (start, direction)
+                written[depth] = filled
+                placed = True
+                break
+
+        cursor[depth] = i
+        if placed:
+            depth += 1
+            best_depth = max(best_depth, depth)
+            continue
+
+        # Возврат: снимаем предыдущее слово и пробуем его следующую позицию
+        cursor[depth] = 0
+        depth -= 1
+        backtracks += 1
+        if depth < 0:
+            stats.update(steps=steps, backtracks=backtracks)
+            raise PlacementError(order[best_depth:], grid_size, steps)
+        for index in written[depth]:
+            if dense:
+                letter_cells[cells[index]].discard(index)
+            cells[index] = ''
+        chosen[depth] = None
+        written[depth] = None
+
+    stats.update(steps=steps, backtracks=backtracks)
+
+    placed_words = []
+    for word, (start, direction) in zip(order, chosen):
+        row, col = divmod(start, grid_size)
+        placed_words.append({
+            'word': word,
+            'row': row,
+            'col': col,
+            'direction': direction,
+            'length': len(word)
+        })
+
+    return cells, placed_words
+
+
+def generate_letter_soup(words: List[str], grid_size=None, include_backwards: bool = False,
+                         include_diagonals: bool = False, rng: Optional[random.Random] = None,
+                         max_steps: int = MAX_PLACEMENT_STEPS, stats: Optional[Dict] = None,
+                         layout: str = LAYOUT_RANDOM,
+                         filler: str = FILLER_FREQUENCY) -> Tuple[List[List[str]], List[Dict]]:
     """
     Генерирует буквенный суп (сетку с словами).
 
+    Либо размещает все слова, либо выбрасывает PlacementError —
+    сетка с пропущенными словами не возвращается.
+
     Args:
         words: Список английских слов
         grid_size: Размер сетки (grid_size x grid_size)
+        include_backwards: Разрешить обратное направление
+        include_diagonals: Разрешить диагонали
+        rng: Генератор случайных чисел (по умолчанию — модуль random)
+        max_steps: Ограничение перебора позиций
+        stats: Словарь для счетчиков перебора (steps, backtracks)
+        layout: Раскладка (LAYOUT_RANDOM или LAYOUT_DENSE)
+        filler: Заполнение пустых клеток (FILLER_UNIFORM или FILLER_FREQUENCY)
 
     Returns:
         Tuple[grid, placed_words]:
             grid: Двумерный список букв
             placed_words: Информация о размещенных словах
+
+    Raises:
+        PlacementError: если разместить все слова не удалось
     """
     if grid_size is None:
-        grid_size = calculate_grid_size(words)
+        grid_size = calculate_grid_size(words, True, include_backwards, include_diagonals)
+    if rng is None:
+        rng = random.Random()
+
+    # Преобразуем слова в верхний регистр, убирая повторы
+    words = list(dict.fromkeys(word.upper() for word in words))
 
-    # Инициализируем пустую сетку
-    grid = [['' for _ in range(grid_size)] for _ in range(grid_size)]
+    directions = get_directions(include_backwards, include_diagonals)
+    cells, placed_words = _place_words(
+        words, grid_size, directions, rng, max_steps, stats, dense=layout == LAYOUT_DENSE
+    )
 
-    # Преобразуем слова в верхний регистр
-    words_upper = [word.upper() for word in words]
+    # Заполняем пустые клетки случайными буквами
+    if filler == FILLER_UNIFORM:
+        for index, cell in enumerate(cells):
+            if not cell:
+                cells[index] = rng.choice(string.ascii_uppercase)
+    else:
+        empty = [index for index, cell in enumerate(cells) if not cell]
+        letters = rng.choices(FILLER_LETTERS, cum_weights=FILLER_CUM_WEIGHTS, k=len(empty))
+        for index, letter in zip(empty, letters):
+            cells[index] = letter
+        _suppress_accidental_words(cells, grid_size, words, placed_words, set(empty),
+                                   include_diagonals, rng)
+
+    grid = [cells[row * grid_size:(row + 1) * grid_size] for row in range(grid_size)]
+    return grid, placed_words
 
-    # Сортируем слова по длине (от самых длинных к самым коротким)
-    words_upper.sort(key=len, reverse=True)
 
-    placed_words = []
+@lru_cache(maxsize=64)
+def _grid_lines(grid_size: int, include_diagonals: bool) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """
+    Все линии сетки (строки, столбцы и, при необходимости, диагонали)
+    в виде последовательностей координат (row, col).
+    """
+    lines = []
+    for i in range(grid_size):
+        lines.append(tuple((i, col) for col in range(grid_size)))
+        lines.append(tuple((row, i) for row in range(grid_size)))
 
-    # Преобразуем слова в верхний регистр
-    words = [word.upper() for word in words]
+    if include_diagonals:
+        for start in range(-(grid_size - 1), grid_size):
+            # Диагональ сверху вниз (↘): col - row = start
+            lines.append(tuple(
+                (row, row + start) for row in range(grid_size) if 0 <= row + start < grid_size
+            ))
+            # Диагональ снизу вверх (↗): row + col = start + grid_size - 1
+            total = start + grid_size - 1
+            lines.append(tuple(
+                (row, total - row) for row in range(grid_size - 1, -1, -1) if 0 <= total - row < grid_size
+            ))
 
-    # Сортируем слова по длине (от самых длинных к самым коротким)
-    words.sort(key=len, reverse=True)
+    return tuple(line for line in lines if line)
 
-    for word in words:
-        placed = False
-        attempts = 0
-        max_attempts = 100
-
-        while not placed and attempts < max_attempts:
-            attempts += 1
-
-            # Выбираем случайное направление: горизонтальное или вертикальное
-            direction = random.choice(['horizontal', 'vertical'])
-
-            if direction == 'horizontal':
-                # Для горизонтального слова
-                max_row = grid_size
-                max_col = grid_size - len(word) + 1
-                if max_col <= 0:
-                    continue  # Слово слишком длинное
-
-                row = random.randint(0, max_row - 1)
-                col = random.randint(0, max_col - 1)
-
-                # Проверяем, можно ли разместить слово
-                can_place = True
-                for i, letter in enumerate(word):
-                    current_cell = grid[row][col + i]
-                    if current_cell != '' and current_cell != letter:
-                        can_place = False
-                        break
-
-                if can_place:
-                    # Размещаем слово
-                    for i, letter in enumerate(word):
-                        grid[row][col + i] = letter
-
-                    placed_words.append({
-                        'word': word,
-                        'row': row,
-                        'col': col,
-                        'direction': direction,
-                        'length': len(word)
-                    })
-                    placed = True
-
-            else:  # vertical
-                # Для вертикального слова
-                max_row = grid_size - len(word) + 1
-                max_col = grid_size
-                if max_row <= 0:
-                    continue  # Слово слишком длинное
-
-                row = random.randint(0, max_row - 1)
-                col = random.randint(0, max_col - 1)
-
-                # Проверяем, можно ли разместить слово
-                can_place = True
-                for i, letter in enumerate(word):
-                    current_cell = grid[row + i][col]
-                    if current_cell != '' and current_cell != letter:
-                        can_place = False
-                        break
-
-                if can_place:
-                    # Размещаем слово
-                    for i, letter in enumerate(word):
-                        grid[row + i][col] = letter
-
-                    placed_words.append({
-                        'word': word,
-                        'row': row,
-                        'col': col,
-                        'direction': direction,
-                        'length': len(word)
-                    })
-                    placed = True
-
-        if not placed:
-            print(f"Не удалось разместить слово: {word}")
 
-    # Заполняем пустые клетки случайными буквами
-    for i in range(grid_size):
-        for j in range(grid_size):
-            if grid[i][j] == '':
-                grid[i][j] = random.choice(string.ascii_uppercase)
+def _word_occurrences(grid: List[List[str]], words: List[str], include_diagonals: bool):
+    """
+    Все вхождения слов в сетку в обоих направлениях.
 
-    return grid, placed_words
+    Yields:
+        (СЛОВО, клетки вхождения ((row, col), ...))
+    """
+    for line in _grid_lines(len(grid), include_diagonals):
+        text = ''.join(grid[row][col] for row, col in line)
+        for word in words:
+            length = len(word)
+            if not length or length > len(text):
+                continue
+            # Порядок фиксирован (не set): от него зависят вызовы rng при исправлении
+            for candidate in dict.fromkeys((word, word[::-1])):
+                position = text.find(candidate)
+                while position != -1:
+                    yield word, line[position:position + length]
+                    position = text.find(candidate, position + 1)
+
+
+def _suppress_accidental_words(cells: List[str], grid_size: int, words: List[str],
+                               placed_words: List[Dict], filler_cells: Set[int],
+                               include_diagonals: bool, rng: random.Random) -> None:
+    """
+    Заменяет буквы-заполнители, которые сложились в искомое слово
+    вне его размещения.
+
+    Сетка просматривается целиком, в каждом лишнем вхождении меняется
+    одна из букв-заполнителей. Замена может породить новое вхождение,
+    поэтому проход повторяется, пока сетка не станет чистой (не более
+    MAX_REPAIR_ROUNDS раз). Вхождения, целиком составленные из букв
+    размещенных слов, исправить нельзя — они остаются.
+    """
+    expected = set()
+    for placed in placed_words:
+        dr, dc = DIRECTIONS[placed['direction']]
+        end_row = placed['row'] + dr * (placed['length'] - 1)
+        end_col = placed['col'] + dc * (placed['length'] - 1)
+        expected.add((placed['word'], *normalize_span(placed['row'], placed['col'], end_row, end_col)))
+
+    for _ in range(MAX_REPAIR_ROUNDS):
+        grid = [cells[row * grid_size:(row + 1) * grid_size] for row in range(grid_size)]
+        changed = set()
+        for word, occurrence in _word_occurrences(grid, words, include_diagonals):
+            if (word, *normalize_span(*occurrence[0], *occurrence[-1])) in expected:
+                continue
+            indexes = [row * grid_size + col for row, col in occurrence]
+            if changed.intersection(indexes):
+                continue  # вхождение уже разрушено в этом проходе
+            fillers = [index for index in indexes if index in filler_cells]
+            if not fillers:
+                continue
+            index = rng.choice(fillers)
+            letter = cells[index]
+            while letter == cells[index]:
+                letter = rng.choices(FILLER_LETTERS, cum_weights=FILLER_CUM_WEIGHTS)[0]
+            cells[index] = letter
+            changed.add(index)
+        if not changed:
+            break
+
+
+def normalize_span(row1: int, col1: int, row2: int, col2: int) -> List[int]:
+    """
+    Приводит отрезок к каноническому виду: начало — меньшая из двух клеток.
+    Так выделение слова с любого конца дает один и тот же ключ.
+    """
+    if (row2, col2) < (row1, col1):
+        row1, col1, row2, col2 = row2, col2, row1, col1
+    return [row1, col1, row2, col2]
 
 
-def validate_word_in_grid(word: str, grid: List[List[str]], placed_words: List[Dict]) -> bool:
+def build_search_index(grid: List[List[str]], words: List[str],
+                       include_diagonals: bool = False) -> Dict[str, List[List[int]]]:
     """
-    Проверяет, есть ли слово в сетке.
+    Строит индекс всех вхождений слов в сетку.
+
+    Просматривает каждую строку, столбец и (при include_diagonals)
+    диагональ сетки в обоих направлениях один раз и записывает все
+    найденные вхождения, в том числе случайные — образованные
+    заполняющими буквами.
 
     Args:
-        word: Слово для проверки (в верхнем регистре)
         grid: Сетка букв
-        placed_words: Информация о размещенных словах
+        words: Слова для поиска
+        include_diagonals: Просматривать также диагонали
+
+    Returns:
+        Словарь {СЛОВО: [[row1, col1, row2, col2], ...]} с отрезками
+        в каноническом виде (см. normalize_span)
+    """
+    words = list(dict.fromkeys(word.upper() for word in words))
+    index = {word: set() for word in words}
+
+    for word, cells in _word_occurrences(grid, words, include_diagonals):
+        index[word].add(tuple(normalize_span(*cells[0], *cells[-1])))
+
+    return {word: sorted(list(span) for span in spans) for word, spans in index.items()}
+
+
+def find_duplicate_words(search_index: Dict[str, List[List[int]]]) -> List[str]:
+    """
+    Возвращает слова, которые встречаются в сетке больше одного раза.
+    """
+    return [word for word, spans in search_index.items() if len(spans) > 1]
+
+
+def validate_selection(word: str, span: List[int], search_index: Dict[str, List[List[int]]]) -> bool:
+    """
+    Проверяет, что выделенный учеником отрезок содержит указанное слово.
+
+    Args:
+        word: Слово
+        span: Координаты [row1, col1, row2, col2] в любом порядке концов
+        search_index: Индекс, построенный build_search_index
+
+    Returns:
+        True если слово находится именно в этом отрезке
+    """
+    return normalize_span(*span) in search_index.get(word.upper(), [])
+
+
+def validate_word_in_grid(word: str, search_index: Dict[str, List[List[int]]]) -> bool:
+    """
+    Проверяет, есть ли слово в сетке.
+
+    Args:
+        word: Слово для проверки
+        search_index: Индекс, построенный build_search_index
 
     Returns:
         True если слово есть в сетке, иначе False
     """
-    word = word.upper()
+    return bool(search_index.get(word.upper()))
 
-    # Проверяем по списку размещенных слов
-    for placed_word in placed_words:
-        if placed_word['word'] == word:
-            return True
 
-    # Также проверяем, можно ли найти слово в сетке (на случай, если алгоритм размещения не записал его)
-    grid_size = len(grid)
+def covered_cells(placed_words: List[Dict]) -> int:
+    """Сколько клеток сетки занято словами (а не случайными буквами)"""
+    cells = set()
+    for placed in placed_words:
+        dr, dc = DIRECTIONS[placed['direction']]
+        for i in range(placed['length']):
+            cells.add((placed['row'] + dr * i, placed['col'] + dc * i))
+    return len(cells)
+
+
+def count_crossings(placed_words: List[Dict]) -> int:
+    """Сколько букв размещенные слова делят между собой"""
+    return sum(placed['length'] for placed in placed_words) - covered_cells(placed_words)
+
+
+def new_letter_seed() -> int:
+    """Случайное зерно для детерминированной генерации сетки."""
+    return random.getrandbits(62)
 
-    # Проверяем горизонтально
-    for i in range(grid_size):
-        for j in range(grid_size - len(word) + 1):
-            found = True
-            for k in range(len(word)):
-                if grid[i][j + k] != word[k]:
-                    found = False
-                    break
-            if found:
-                return True
-
-    # Проверяем вертикально
-    for i in range(grid_size - len(word) + 1):
-        for j in range(grid_size):
-            found = True
-            for k in range(len(word)):
-                if grid[i + k][j] != word[k]:
-                    found = False
-                    break
-            if found:
-                return True
 
-    return False
+def _build_letter_soup(words: Tuple[str, ...], grid_size: int, include_backwards: bool,
+                       include_diagonals: bool, seed: int, layout: str = LAYOUT_RANDOM,
+                       filler: str = FILLER_FREQUENCY):
+    """Генерирует сетку по зерну и строит для нее поисковый индекс."""
+    grid, placed_words = generate_letter_soup(
+        list(words), grid_size, include_backwards, include_diagonals,
+        rng=random.Random(seed), layout=layout, filler=filler
+    )
+    return grid, placed_words, build_search_index(grid, words, include_diagonals)
+
+
+@lru_cache(maxsize=256)
+def regenerate_letter_soup(words: Tuple[str, ...], grid_size: int, include_backwards: bool,
+                           include_diagonals: bool, seed: int, layout: str = LAYOUT_RANDOM,
+                           filler: str = FILLER_FREQUENCY) -> Tuple[List[List[str]], List[Dict], Dict[str, List[List[int]]]]:
+    """
+    Детерминированно восстанавливает буквенный суп по зерну.
+
+    Результат кэшируется, поэтому возвращаемые списки и словари
+    общие для всех вызовов и не должны изменяться.
+
+    Args:
+        words: Слова в том же порядке, что и при создании
+        grid_size: Размер сетки
+        include_backwards: Разрешить обратное направление
+        include_diagonals: Разрешить диагонали
+        seed: Зерно генератора случайных чисел
+        layout: Раскладка, с которой сетка была создана
+        filler: Заполнение, с которым сетка была создана
+
+    Returns:
+        Tuple[grid, placed_words, search_index]
+
+    Raises:
+        PlacementError: если разместить все слова не удалось
+    """
+    return _build_letter_soup(words, grid_size, include_backwards, include_diagonals, seed, layout, filler)
+
+
+def create_letter_soup(words: List[str], grid_size: int, include_backwards: bool = False,
+                       include_diagonals: bool = False, layout: str = LAYOUT_RANDOM,
+                       attempts: int = MAX_REGENERATE_ATTEMPTS, time_budget: float = DENSE_TIME_BUDGET,
+                       filler: str = FILLER_FREQUENCY):
+    """
+    Подбирает зерно, при котором все слова размещены и ни одно из них
+    не встречается в сетке дважды (случайные буквы иногда складываются
+    в еще одно искомое слово).
+
+    В режиме LAYOUT_RANDOM берется первое подходящее из attempts зерен.
+    В режиме LAYOUT_DENSE зерна перебираются, пока не истечет
+    time_budget секунд, и выбирается сетка с наибольшим числом
+    пересечений (см. count_crossings).
+
+    Returns:
+        Tuple[seed, (grid, placed_words, search_index)]
+
+    Raises:
+        PlacementError: если ни одно зерно не подошло
+    """
+    words = tuple(words)
+    dense = layout == LAYOUT_DENSE
+    deadline = time.perf_counter() + time_budget
+    result = None
+    best = None
+    error = None
+    tried = 0
+    while True:
+        tried += 1
+        seed = new_letter_seed()
+        try:
+            soup = _build_letter_soup(words, grid_size, include_backwards, include_diagonals,
+                                      seed, layout, filler)
+        except PlacementError as e:
+            if not e.steps:
+                raise  # слово длиннее сетки — другие зерна не помогут
+            error = e
+        else:
+            # Сетка без повторов всегда лучше сетки с повторами
+            score = (not find_duplicate_words(soup[2]), count_crossings(soup[1]) if dense else 0)
+            if best is None or score > best:
+                result, best = (seed, soup), score
+            if not dense and score[0]:
+                break
+
+        if dense:
+            if time.perf_counter() >= deadline:
+                break
+        elif tried >= attempts:
+            break
+
+    if result is None:
+        raise error
+    return result
+
+
+def check_words_fit(words: List[str], grid_size: int, include_backwards: bool = False,
+                    include_diagonals: bool = False, layout: str = LAYOUT_RANDOM) -> None:
+    """
+    Проверяет, что слова помещаются в сетку, не генерируя суп целиком
+    (без заполнения, исправления случайных вхождений и индекса).
+
+    Если слова помещаются без пересечений (find_min_grid_size при любой
+    плотности), проверка берется из кэша; иначе пробуется размещение
+    самих слов с несколькими зернами.
+
+    Raises:
+        PlacementError: если слова не помещаются
+    """
+    min_size = find_min_grid_size(words, include_backwards, include_diagonals, target_density=1.0)
+    if min_size < MAX_GRID_SIZE and min_size <= grid_size:
+        return
+
+    words = list(dict.fromkeys(word.upper() for word in words))
+    directions = get_directions(include_backwards, include_diagonals)
+    error = None
+    for _ in range(MAX_REGENERATE_ATTEMPTS):
+        try:
+            _place_words(words, grid_size, directions, random.Random(new_letter_seed()),
+                         MAX_PLACEMENT_STEPS, dense=layout == LAYOUT_DENSE)
+            return
+        except PlacementError as e:
+            if not e.steps:
+                raise  # слово длиннее сетки — другие зерна не помогут
+            error = e
+    raise error
+
+
+def _create_letter_soup_seed(args) -> int:
+    """Обертка для пула процессов: возвращает только зерно."""
+    words, grid_size, include_backwards, include_diagonals, layout, filler = args
+    seed, _ = create_letter_soup(words, grid_size, include_backwards, include_diagonals, layout, filler=filler)
+    return seed
+
+
+def create_letter_soup_seeds(words: List[str], grid_size: int, count: int, include_backwards: bool = False,
+                             include_diagonals: bool = False, workers: Optional[int] = None,
+                             layout: str = LAYOUT_RANDOM, filler: str = FILLER_FREQUENCY) -> List[int]:
+    """
+    Подбирает count разных зерен для одного списка слов.
+
+    Генерация выполняется в пуле процессов: каждое зерно проверяется
+    полной генерацией сетки, а это чистая работа процессора.
+
+    Args:
+        words: Список английских слов
+        grid_size: Размер сетки
+        count: Сколько сеток нужно
+        include_backwards: Разрешить обратное направление
+        include_diagonals: Разрешить диагонали
+        workers: Число процессов (по умолчанию — число ядер; 1 — без пула)
+        layout: Раскладка (LAYOUT_RANDOM или LAYOUT_DENSE)
+        filler: Заполнение пустых клеток (FILLER_UNIFORM или FILLER_FREQUENCY)
+
+    Returns:
+        Список из count зерен
+
+    Raises:
+        PlacementError: если слова не помещаются в сетку
+    """
+    if count <= 0:
+        return []
+
+    # Сначала одна сетка в текущем процессе: если слова не помещаются,
+    # незачем запускать пул
+    seeds = [create_letter_soup(words, grid_size, include_backwards, include_diagonals, layout, filler=filler)[0]]
+
+    workers = min(workers or os.cpu_count() or 1, count - 1)
+    tasks = [(list(words), grid_size, include_backwards, include_diagonals, layout, filler)] * (count - 1)
+    if workers <= 1:
+        seeds += [_create_letter_soup_seed(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            seeds += list(executor.map(_create_letter_soup_seed, tasks))
+
+    return seeds
 
 
 def get_grid_preview(grid: List[List[str]]) -> str:
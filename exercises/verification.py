@@ -0,0 +1,218 @@
+# exercises/verification.py
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from vocabulary import buffer as word_stats_buffer
+from vocabulary.models import StudentWord, WordAttempt
+from .utils import validate_selection
+
+
+def parse_selections(data):
+    """
+    Приводит выделения из запроса к виду (СЛОВО, [row1, col1, row2, col2], response_time).
+
+    Raises:
+        ValueError: если данные не в ожидаемом формате
+    """
+    selections = data.get('selections')
+    if not isinstance(selections, list):
+        raise ValueError('Ожидается список selections')
+
+    parsed = []
+    for selection in selections:
+        if not isinstance(selection, dict):
+            raise ValueError('Выделение должно быть объектом')
+        word = selection.get('word')
+        span = selection.get('span')
+        if not isinstance(word, str) or not word.strip():
+            raise ValueError('Не указано слово')
+        if not isinstance(span, list) or len(span) != 4:
+            raise ValueError(f'Неверные координаты для слова "{word}"')
+        try:
+            span = [int(value) for value in span]
+            response_time = int(selection.get('response_time') or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f'Неверные координаты для слова "{word}"')
+        parsed.append((word.strip().upper(), span, max(response_time, 0)))
+
+    return parsed
+
+
+def verify_letter_soup(exercise, selections):
+    """
+    Проверяет найденные учеником слова и обновляет статистику StudentWord.
+
+    Все выделения проверяются по поисковому индексу сетки за один проход,
+    каждое слово учитывается один раз (по первому выделению). Слова, ответ
+    на которые по этому упражнению уже есть в журнале WordAttempt
+    (повторный запрос), в статистику второй раз не попадают; ответы, еще
+    лежащие в буфере WORD_STATS_BUFFER, здесь не видны. Статистика
+    всех слов записывается в одной транзакции (см. record_attempts).
+
+    Args:
+        exercise: Упражнение типа letter_soup
+        selections: Результат parse_selections
+
+    Returns:
+        Список {'word', 'correct'} в порядке выделений
+    """
+    letter_soup = exercise.lettersoupexercise
+    search_index = letter_soup.get_search_index()
+
+    # Английское слово → ID слова из словаря (у старых упражнений ID нет)
+    word_ids = {}
+    for pair in letter_soup.pairs:
+        if pair.get('english'):
+            word_ids[pair['english'].upper()] = pair.get('word_id')
+    if not word_ids:
+        word_ids = {word.upper(): None for word in letter_soup.words}
+
+    results = []
+    attempts = {}
+    for word, span, response_time in selections:
+        if word not in word_ids:
+            results.append({'word': word, 'correct': False})
+            continue
+        correct = validate_selection(word, span, search_index)
+        results.append({'word': word, 'correct': correct})
+        attempts.setdefault(word, [(correct, response_time)])
+
+    for english in WordAttempt.objects.filter(exercise=exercise).values_list('word__english', flat=True).distinct():
+        attempts.pop(english.upper(), None)
+
+    if not attempts:
+        return results
+
+    ids = [word_ids[word] for word in attempts if word_ids[word]]
+    english = [word for word in attempts if not word_ids[word]]
+    conditions = [Q(word_id__in=ids)] if ids else []
+    conditions += [Q(word__english__iexact=word) for word in english]
+
+    record_attempts(
+        exercise,
+        reduce(or_, conditions),
+        attempts,
+        key=lambda student_word: student_word.word.english.upper()
+    )
+
+    return results
+
+
+def parse_answer_events(data):
+    """
+    Приводит ответы из запроса к виду (word_id, is_correct, response_time).
+
+    Raises:
+        ValueError: если данные не в ожидаемом формате
+    """
+    events = data.get('events')
+    if not isinstance(events, list):
+        raise ValueError('Ожидается список events')
+
+    parsed = []
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError('Ответ должен быть объектом')
+        try:
+            word_id = int(event['word_id'])
+            response_time = int(float(event.get('response_time') or 0))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Неверный word_id или response_time')
+        parsed.append((word_id, event.get('is_correct') is True, max(response_time, 0)))
+
+    return parsed
+
+
+def record_answers(exercise, events):
+    """
+    Применяет пачку ответов ученика к статистике StudentWord.
+
+    Учитываются только слова из пар упражнения; ответы на одно слово
+    применяются в порядке поступления.
+
+    Args:
+        exercise: Упражнение с полем pairs (spelling, drag_drop)
+        events: Результат parse_answer_events
+
+    Returns:
+        Количество обновленных слов
+    """
+    word_ids = {pair.get('word_id') for pair in exercise.get_concrete_exercise().pairs}
+
+    attempts = {}
+    for word_id, is_correct, response_time in events:
+        if word_id in word_ids:
+            attempts.setdefault(word_id, []).append((is_correct, response_time))
+
+    if not attempts:
+        return 0
+
+    updated = record_attempts(
+        exercise,
+        Q(word_id__in=attempts),
+        attempts,
+        key=lambda student_word: student_word.word_id
+    )
+    return len(updated)
+
+
+def record_attempts(exercise, condition, attempts, key):
+    """
+    Записывает ответы ученика в журнал WordAttempt одной вставкой и,
+    если settings.WORD_STATS_ROLLUP выключен, сразу применяет их
+    к статистике слов в той же транзакции. При settings.WORD_STATS_BUFFER
+    ответы только складываются в буфер (см. vocabulary.buffer).
+
+    Ответы применяются через StudentWord.update_statistics_many —
+    выражениями UPDATE, а не чтением и перезаписью строк, поэтому
+    одновременные запросы не теряют приращений; сводки StudentStats
+    получают приращения там же.
+
+    Args:
+        exercise: Упражнение, к которому относятся ответы
+        condition: Q-условие, выбирающее нужные StudentWord
+        attempts: {ключ: [(is_correct, response_time), ...]}
+        key: Функция StudentWord -> ключ в attempts
+
+    Returns:
+        Список StudentWord, к которым относятся ответы
+    """
+    matched = []
+    for student_word in StudentWord.objects.select_related('word').filter(condition, student=exercise.student):
+        events = attempts.get(key(student_word))
+        if events:
+            matched.append((student_word, events))
+
+    if word_stats_buffer.is_enabled():
+        for student_word, events in matched:
+            for is_correct, response_time in events:
+                word_stats_buffer.buffer_attempt(
+                    student_word.student_id, student_word.word_id, is_correct, response_time, exercise.id
+                )
+        return [student_word for student_word, _ in matched]
+
+    with transaction.atomic():
+        log = WordAttempt.objects.bulk_create([
+            WordAttempt(
+                student_id=student_word.student_id,
+                word_id=student_word.word_id,
+                exercise=exercise,
+                is_correct=is_correct,
+                response_time=response_time
+            )
+            for student_word, events in matched
+            for is_correct, response_time in events
+        ])
+
+        if not getattr(settings, 'WORD_STATS_ROLLUP', False):
+            student_word_ids = {student_word.word_id: student_word.pk for student_word, _ in matched}
+            StudentWord.update_statistics_many([
+                (student_word_ids[attempt.word_id], attempt.is_correct, attempt.response_time, attempt.id, None)
+                for attempt in log
+            ])
+
+    return [student_word for student_word, _ in matched]
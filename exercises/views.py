@@ -2,11 +2,15 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.db.models import Count, Prefetch, Q
 from django.utils import timezone
 
+from vocabulary import buffer as word_stats_buffer
 from vocabulary.models import StudentWord
-from .forms import LetterSoupExerciseForm, DragDropExerciseForm, SpellingExerciseForm
-from .models import Exercise
+from .forms import LetterSoupExerciseForm, LetterSoupBatchForm, DragDropExerciseForm, SpellingExerciseForm
+from .models import Exercise, LetterSoupExercise
+from .utils import PlacementError
+from .verification import parse_selections, verify_letter_soup, parse_answer_events, record_answers
 from users.models import User
 import json
 
@@ -66,6 +70,48 @@ def create_letter_soup(request, student_id=None):
         'students': User.objects.filter(role='student')
     })
 
+@login_required
+def create_letter_soup_batch(request):
+    """Массовое создание упражнений Letter Soup: своя сетка каждому ученику"""
+    if not request.user.is_teacher():
+        return redirect('dashboard:home')
+
+    if request.method == 'POST':
+        form = LetterSoupBatchForm(request.POST)
+
+        if form.is_valid():
+            try:
+                exercises = form.save(teacher=request.user)
+            except PlacementError as e:
+                # Форма проверяет только размещение слов, сетки строятся здесь
+                form.add_placement_error(e)
+            else:
+                messages.success(request, f'Создано упражнений "Буквенный суп": {len(exercises)}')
+                return redirect('exercises:teacher_exercises')
+    else:
+        form = LetterSoupBatchForm()
+
+    return render(request, 'exercises/create_letter_soup_batch.html', {
+        'form': form,
+    })
+
+
+def with_concrete_exercises(exercises):
+    """
+    Подгружает конкретные упражнения (по запросу на тип), чтобы
+    get_concrete_exercise не обращался к базе для каждой строки.
+    Сетка и индекс буквенного супа в списках не нужны.
+    """
+    return exercises.prefetch_related(
+        'spellingexercise',
+        'dragdropexercise',
+        Prefetch(
+            'lettersoupexercise',
+            queryset=LetterSoupExercise.objects.defer('grid', 'placed_words', 'search_index')
+        ),
+    )
+
+
 @login_required
 def teacher_exercises_list(request, student_id=None):
     """Список упражнений для учителя"""
@@ -81,23 +127,35 @@ def teacher_exercises_list(request, student_id=None):
         exercises = exercises.filter(student=student)
     else:
         student = None
+        exercises = exercises.select_related('student')
+
+    # Упражнения загружаются один раз, число запросов не зависит от учеников
+    exercises = list(with_concrete_exercises(exercises))
 
     # Группируем по ученикам для общего списка
     students_with_exercises = []
     if not student_id:
+        # Счетчики по статусам считает база одним запросом
         students = User.objects.filter(
             role='student',
             exercises__teacher=request.user
-        ).distinct()
+        ).annotate(
+            exercise_count=Count('exercises'),
+            completed_count=Count('exercises', filter=Q(exercises__status='completed')),
+            graded_count=Count('exercises', filter=Q(exercises__status='graded')),
+        )
+
+        by_student = {}
+        for exercise in exercises:
+            by_student.setdefault(exercise.student_id, []).append(exercise)
 
         for s in students:
-            student_exercises = exercises.filter(student=s)
             students_with_exercises.append({
                 'student': s,
-                'exercises': student_exercises,
-                'count': student_exercises.count(),
-                'completed': student_exercises.filter(status='completed').count(),
-                'graded': student_exercises.filter(status='graded').count(),
+                'exercises': by_student.get(s.id, []),
+                'count': s.exercise_count,
+                'completed': s.completed_count,
+                'graded': s.graded_count,
             })
 
     return render(request, 'exercises/list.html', {
@@ -191,13 +249,15 @@ def do_exercise(request, exercise_id):
             words = letter_soup.words
             pairs = [{'english': word, 'russian': '???'} for word in words]
 
+        # Расположение слов странице не передается: выделения проверяет сервер
+        grid, _, _ = letter_soup.get_layout()
+
         return render(request, 'exercises/letter_soup.html', {
             'exercise': exercise,
             'letter_soup': letter_soup,
             'words': words,
             'pairs': pairs,
-            'grid': letter_soup.grid,
-            'placed_words': letter_soup.placed_words,
+            'grid': grid,
             'grid_size': letter_soup.grid_size,
         })
 
@@ -223,6 +283,43 @@ def complete_exercise(request, exercise_id):
 
     return JsonResponse({'success': False, 'error': 'Неверный метод запроса'})
 
+@login_required
+def verify_letter_soup_selections(request, exercise_id):
+    """
+    Проверка найденных слов буквенного супа одним запросом.
+
+    Ожидает JSON {"selections": [{"word", "span": [row1, col1, row2, col2],
+    "response_time"}], "complete": bool} и обновляет статистику слов.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Неверный метод запроса'})
+
+    exercise = get_object_or_404(Exercise, id=exercise_id, exercise_type='letter_soup')
+
+    if request.user != exercise.student:
+        return JsonResponse({'success': False, 'error': 'Нет доступа'})
+
+    if exercise.status in ['completed', 'graded']:
+        return JsonResponse({'success': False, 'error': 'Задание уже выполнено или проверено'})
+
+    try:
+        data = json.loads(request.body)
+        selections = parse_selections(data)
+    except (json.JSONDecodeError, AttributeError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': f'Неверные данные: {e}'})
+
+    results = verify_letter_soup(exercise, selections)
+
+    if data.get('complete'):
+        exercise.complete_attempt()
+
+    return JsonResponse({
+        'success': True,
+        'results': results,
+        'correct': sum(result['correct'] for result in results),
+    })
+
+
 @login_required
 def delete_exercise(request, exercise_id):
     """Удаление упражнения"""
@@ -286,8 +383,13 @@ def update_word_stat(request, exercise_id):
             # Находим StudentWord
             student_word = StudentWord.objects.get(student=exercise.student, word__id=word_id)
 
-            # Обновляем статистику
-            student_word.update_statistics(is_correct=is_correct, response_time=response_time)
+            # Обновляем статистику (или откладываем запись в буфер)
+            if word_stats_buffer.is_enabled():
+                word_stats_buffer.buffer_attempt(
+                    student_word.student_id, student_word.word_id, is_correct, response_time, exercise.id
+                )
+            else:
+                student_word.record_attempt(is_correct=is_correct, response_time=response_time, exercise=exercise)
 
             return JsonResponse({'success': True})
         except StudentWord.DoesNotExist:
@@ -297,6 +399,36 @@ def update_word_stat(request, exercise_id):
 
     return JsonResponse({'success': False, 'error': 'Неверный метод запроса'})
 
+@login_required
+def update_word_stats_batch(request, exercise_id):
+    """
+    Пакетное обновление статистики StudentWord (spelling, drag & drop).
+
+    Ожидает JSON {"events": [{"word_id", "is_correct", "response_time"}],
+    "complete": bool}; response_time — в миллисекундах. Все ответы
+    применяются в одной транзакции.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Неверный метод запроса'})
+
+    exercise = get_object_or_404(Exercise, id=exercise_id, exercise_type__in=['spelling', 'drag_drop'])
+
+    if request.user != exercise.student:
+        return JsonResponse({'success': False, 'error': 'Нет доступа'})
+
+    try:
+        data = json.loads(request.body)
+        events = parse_answer_events(data)
+    except (json.JSONDecodeError, AttributeError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': f'Неверные данные: {e}'})
+
+    updated = record_answers(exercise, events)
+
+    if data.get('complete') and exercise.status not in ['completed', 'graded']:
+        exercise.complete_attempt()
+
+    return JsonResponse({'success': True, 'updated': updated})
+
 # Добавить в существующий views.py после create_letter_soup
 
 @login_required
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class VocabularyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vocabulary'
+
+    def ready(self):
+        from . import buffer, signals  # noqa: F401
+
+        if buffer.is_enabled():
+            # Буфер в локальной памяти пропадет вместе с процессом
+            import atexit
+            atexit.register(buffer.flush_word_stats)
+            buffer.start_flush_thread()
@@ -0,0 +1,182 @@
+"""
+Буфер ответов учеников (write-behind).
+
+При settings.WORD_STATS_BUFFER ответы (update_word_stat, пакеты
+spelling и drag & drop, проверка letter soup) не пишутся в базу сразу,
+а складываются в кэш Django: каждый ответ — отдельный ключ с номером из
+атомарного счетчика (cache.incr), поэтому одновременные ответы не
+перезаписывают друг друга. flush_word_stats переносит накопленное в
+журнал WordAttempt одной вставкой и в той же транзакции обновляет
+счетчики StudentWord.
+
+Кэш должен поддерживать атомарный incr и не вытеснять ответы до
+переноса (MAX_ENTRIES):
+- общий кэш (Redis, Memcached) — переносит команда flush_word_stats
+  по расписанию или фоновый поток;
+- локальная память — у каждого процесса свой буфер, другие процессы
+  (и команда flush_word_stats) его не видят, поэтому переносит только
+  фоновый поток процесса: WORD_STATS_FLUSH_INTERVAL должен быть больше 0.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WordAttempt
+from .rollup import apply_word_attempts
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'word_stats'
+SEQUENCE_KEY = f'{KEY_PREFIX}:sequence'
+FLUSHED_KEY = f'{KEY_PREFIX}:flushed'
+GAP_KEY = f'{KEY_PREFIX}:gap'
+LOCK_KEY = f'{KEY_PREFIX}:lock'
+LOCK_TIMEOUT = 60
+FLUSH_INTERVAL = 5  # секунд, если WORD_STATS_FLUSH_INTERVAL не задан
+
+
+def is_enabled():
+    return getattr(settings, 'WORD_STATS_BUFFER', False)
+
+
+def get_cache():
+    return caches[getattr(settings, 'WORD_STATS_BUFFER_CACHE', 'word_stats')]
+
+
+def is_process_local():
+    """Буфер в локальной памяти процесса: другие процессы его не видят"""
+    return isinstance(get_cache(), LocMemCache)
+
+
+def buffer_attempt(student_id, word_id, is_correct, response_time=0, exercise_id=None):
+    """Добавляет ответ в буфер"""
+    cache = get_cache()
+    cache.add(SEQUENCE_KEY, 0, timeout=None)
+    number = cache.incr(SEQUENCE_KEY)
+    cache.set(f'{KEY_PREFIX}:event:{number}', (
+        student_id, word_id, exercise_id, bool(is_correct), int(response_time), timezone.now()
+    ), timeout=None)
+
+
+def flush_word_stats():
+    """
+    Переносит ответы из буфера в базу.
+
+    Ответы записываются в WordAttempt одним bulk_create; если
+    settings.WORD_STATS_ROLLUP выключен, в той же транзакции они
+    применяются к счетчикам StudentWord. Номер, выданный ответу, но еще не
+    записанный в кэш, ждет следующего вызова; если он пропал и тогда,
+    ответ считается потерянным.
+
+    Returns:
+        Количество перенесенных ответов
+    """
+    cache = get_cache()
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        return 0  # буфер уже переносит другой поток или процесс
+
+    try:
+        flushed = cache.get(FLUSHED_KEY, 0)
+        last = cache.get(SEQUENCE_KEY, 0)
+        if last <= flushed:
+            return 0
+
+        keys = [f'{KEY_PREFIX}:event:{number}' for number in range(flushed + 1, last + 1)]
+        events = cache.get_many(keys)
+
+        attempts = []
+        processed = flushed
+        for number, key in enumerate(keys, start=flushed + 1):
+            event = events.get(key)
+            if event is None:
+                if cache.get(GAP_KEY) != number:
+                    cache.set(GAP_KEY, number, timeout=None)
+                    break
+                logger.warning('Ответ №%s пропал из буфера статистики', number)
+            else:
+                student_id, word_id, exercise_id, is_correct, response_time, created_at = event
+                attempts.append(WordAttempt(
+                    student_id=student_id,
+                    word_id=word_id,
+                    exercise_id=exercise_id,
+                    is_correct=is_correct,
+                    response_time=response_time,
+                    created_at=created_at
+                ))
+            processed = number
+
+        if attempts:
+            with transaction.atomic():
+                attempts = WordAttempt.objects.bulk_create(_without_deleted(attempts))
+                if not getattr(settings, 'WORD_STATS_ROLLUP', False):
+                    apply_word_attempts(attempts)
+
+        cache.delete_many(keys[:processed - flushed])
+        cache.set(FLUSHED_KEY, processed, timeout=None)
+    finally:
+        cache.delete(LOCK_KEY)
+
+    return len(attempts)
+
+
+def _without_deleted(attempts):
+    """
+    Убирает ответы учеников и слов, удаленных после buffer_attempt, а
+    ссылку на удаленное упражнение обнуляет (как SET_NULL в WordAttempt).
+    Иначе вставка падала бы на внешнем ключе при каждом переносе и
+    буфер дальше этого ответа не продвигался.
+    """
+    def existing(field_name):
+        field = WordAttempt._meta.get_field(field_name)
+        ids = {getattr(attempt, field.attname) for attempt in attempts} - {None}
+        return set(field.related_model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    students, words, exercises = existing('student'), existing('word'), existing('exercise')
+    kept = []
+    for attempt in attempts:
+        if attempt.student_id not in students or attempt.word_id not in words:
+            logger.warning(
+                'Ответ ученика %s на слово %s отброшен: ученик или слово удалены',
+                attempt.student_id, attempt.word_id
+            )
+            continue
+        if attempt.exercise_id not in exercises:
+            attempt.exercise_id = None
+        kept.append(attempt)
+    return kept
+
+
+def _flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_word_stats()
+        except Exception:
+            logger.exception('Не удалось перенести буфер статистики')
+
+
+def start_flush_thread():
+    """
+    Запускает фоновый перенос буфера (settings.WORD_STATS_FLUSH_INTERVAL секунд).
+
+    0 — без потока, только для общего кэша, который переносит команда
+    flush_word_stats: буфер в локальной памяти иначе не переносился бы.
+    """
+    interval = getattr(settings, 'WORD_STATS_FLUSH_INTERVAL', FLUSH_INTERVAL)
+    if interval <= 0:
+        if is_process_local():
+            raise ImproperlyConfigured(
+                'Буфер статистики в локальной памяти переносит только фоновый поток: '
+                'задайте WORD_STATS_FLUSH_INTERVAL больше 0 или общий кэш в WORD_STATS_BUFFER_CACHE'
+            )
+        return
+    threading.Thread(
+        target=_flush_periodically, args=(interval,), name='word-stats-flush', daemon=True
+    ).start()
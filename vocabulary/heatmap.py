@@ -0,0 +1,135 @@
+# vocabulary/heatmap.py
+"""
+Тепловая карта класса: точность, доля изученных слов и среднее время
+ответа для каждой пары (ученик, тема).
+
+Матрица считается одним GROUP BY по StudentWord ⋈ Word и разворачивается
+в памяти в плоские массивы по строкам (ячейка ученика i и темы j имеет
+индекс i * len(topics) + j). Результат кэшируется для учителя; в ключ
+входят версии данных всех учеников (StudentStats.version), поэтому
+любое изменение слов, тем или учеников дает новый ключ.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from users.models import User
+from .models import StudentWord
+
+CACHE_PREFIX = 'class_heatmap'
+
+# Столбец для слов без темы (всегда последний)
+NO_TOPIC = {'id': None, 'name': 'Без темы', 'color': '#6c757d'}
+
+CSV_HEADER = ['Ученик', 'Логин', 'Тема', 'Слов', 'Изучено %', 'Точность %', 'Среднее время ответа (мс)']
+
+
+def class_heatmap(teacher):
+    """
+    Матрица ученик × тема для кабинета учителя (из кэша, если данные
+    учеников не менялись).
+
+    Returns:
+        {
+            'students': [{'id', 'name', 'username'}, ...],
+            'topics': [{'id', 'name', 'color'}, ...],
+            'words': [...],              # слов в ячейке, 0 — нет слов
+            'completion': [...],         # % изученных слов или None
+            'accuracy': [...],           # % правильных ответов или None
+            'avg_response_time': [...],  # мс на ответ или None
+        }
+    """
+    students = list(
+        User.objects.filter(role='student').order_by('id')
+        .values_list('id', 'username', 'first_name', 'last_name', 'stats__version')
+    )
+    versions = [(student[0], student[-1]) for student in students]
+    key = '{}:{}:{}'.format(CACHE_PREFIX, teacher.pk, hashlib.md5(repr(versions).encode()).hexdigest())
+
+    data = cache.get(key)
+    if data is None:
+        data = build_heatmap(students)
+        cache.set(key, data, None)
+    return data
+
+
+def build_heatmap(students):
+    """
+    Считает матрицу одним запросом.
+
+    Args:
+        students: [(id, username, first_name, last_name, ...), ...] — строки матрицы
+    """
+    student_index = {student[0]: i for i, student in enumerate(students)}
+
+    rows = [
+        row for row in StudentWord.objects.order_by().values(
+            'student_id', 'word__topic_id', 'word__topic__name', 'word__topic__color'
+        ).annotate(
+            words=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            attempts=Coalesce(Sum('times_attempted'), 0),
+            correct=Coalesce(Sum('times_correct'), 0),
+            response_time=Coalesce(Sum('total_response_time'), 0),
+        ).values_list(
+            'student_id', 'word__topic_id', 'word__topic__name', 'word__topic__color',
+            'words', 'completed', 'attempts', 'correct', 'response_time'
+        )
+        if row[0] in student_index
+    ]
+
+    # Столбцы — только темы, в которых у кого-то есть слова
+    topics = {}
+    for _, topic_id, name, color, *_ in rows:
+        if topic_id not in topics:
+            topics[topic_id] = NO_TOPIC if topic_id is None else {'id': topic_id, 'name': name, 'color': color}
+    topics = sorted(topics.values(), key=lambda topic: (topic['id'] is None, topic['name'].lower()))
+    topic_index = {topic['id']: j for j, topic in enumerate(topics)}
+
+    size = len(students) * len(topics)
+    words = [0] * size
+    completion = [None] * size
+    accuracy = [None] * size
+    avg_response_time = [None] * size
+
+    for student_id, topic_id, _, _, count, completed, attempts, correct, response_time in rows:
+        cell = student_index[student_id] * len(topics) + topic_index[topic_id]
+        words[cell] = count
+        completion[cell] = round(completed / count * 100, 1)
+        if attempts:
+            accuracy[cell] = round(correct / attempts * 100, 1)
+            avg_response_time[cell] = round(response_time / attempts)
+
+    return {
+        'students': [
+            {'id': student_id, 'name': f'{first_name} {last_name}'.strip() or username, 'username': username}
+            for student_id, username, first_name, last_name, *_ in students
+        ],
+        'topics': topics,
+        'words': words,
+        'completion': completion,
+        'accuracy': accuracy,
+        'avg_response_time': avg_response_time,
+    }
+
+
+def heatmap_csv_rows(data):
+    """Строки CSV: заголовок и по строке на каждую непустую ячейку матрицы"""
+    yield CSV_HEADER
+    width = len(data['topics'])
+    for i, student in enumerate(data['students']):
+        for j, topic in enumerate(data['topics']):
+            cell = i * width + j
+            if not data['words'][cell]:
+                continue
+            yield [
+                student['name'],
+                student['username'],
+                topic['name'],
+                data['words'][cell],
+                data['completion'][cell],
+                '' if data['accuracy'][cell] is None else data['accuracy'][cell],
+                '' if data['avg_response_time'][cell] is None else data['avg_response_time'][cell],
+            ]
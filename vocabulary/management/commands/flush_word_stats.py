@@ -0,0 +1,20 @@
+# vocabulary/management/commands/flush_word_stats.py
+from django.core.management.base import BaseCommand, CommandError
+from vocabulary.buffer import flush_word_stats, is_process_local
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенос ответов из буфера статистики (WORD_STATS_BUFFER) в базу. '
+        'Работает с общим кэшем (Redis, Memcached); буфер в локальной памяти '
+        'переносит фоновый поток (WORD_STATS_FLUSH_INTERVAL)'
+    )
+
+    def handle(self, *args, **options):
+        if is_process_local():
+            raise CommandError(
+                'Буфер в локальной памяти (WORD_STATS_BUFFER_CACHE) виден только процессам сайта, '
+                'его переносит их фоновый поток. Для команды нужен общий кэш (Redis, Memcached)'
+            )
+        total = flush_word_stats()
+        self.stdout.write(self.style.SUCCESS(f'Перенесено ответов: {total}'))
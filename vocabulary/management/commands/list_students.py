@@ -1,35 +1,44 @@
+from collections import defaultdict
+
 from django.core.management.base import BaseCommand
 from users.models import User
-from vocabulary.models import StudentWord
-from django.db.models import Count
+from vocabulary.models import StudentTopicStats
+from django.db.models import F
 
 
 class Command(BaseCommand):
     help = 'Показать список учеников со статистикой слов'
 
     def handle(self, *args, **kwargs):
-        students = User.objects.filter(role='student').annotate(
-            word_count=Count('assigned_words')
-        ).order_by('-word_count')
+        # Количество слов берем из сводок StudentStats
+        students = User.objects.filter(role='student').select_related('stats').order_by(
+            F('stats__total_words').desc(nulls_last=True)
+        )
 
         print("=" * 60)
         print(f"{'Ученик':20} {'Имя':20} {'Слов':5} {'Темы':10}")
         print("=" * 60)
 
+        # Прогресс по темам всех учеников — одним чтением StudentTopicStats
+        topic_stats = defaultdict(list)
+        for stat in StudentTopicStats.objects.filter(total_words__gt=0).select_related('topic'):
+            topic_stats[stat.student_id].append((stat.topic.name, stat.total_words))
+
         for student in students:
-            # Получаем статистику по темам
-            topic_stats = StudentWord.objects.filter(
-                student=student
-            ).select_related('word__topic').values(
-                'word__topic__name'
-            ).annotate(count=Count('id')).order_by('-count')[:3]
-
-            topics_str = ", ".join([f"{stat['word__topic__name'] or 'Без темы'}"
-                                    for stat in topic_stats[:2]])
-            if topic_stats.count() > 2:
-                topics_str += f" (+{topic_stats.count() - 2})"
+            word_count = student.stats.total_words if hasattr(student, 'stats') else 0
+
+            # Темы с наибольшим числом слов; слова без темы — остаток до общего числа
+            topics = topic_stats[student.id]
+            without_topic = word_count - sum(count for _, count in topics)
+            if without_topic > 0:
+                topics.append(('Без темы', without_topic))
+            topics.sort(key=lambda topic: -topic[1])
+
+            topics_str = ", ".join([name for name, _ in topics[:2]])
+            if len(topics) > 2:
+                topics_str += f" (+{len(topics) - 2})"
 
             print(f"{student.username:20} "
                   f"{student.get_full_name()[:18]:20} "
-                  f"{student.word_count:5} "
-                  f"{topics_str[:30]:30}")
\ No newline at end of file
+                  f"{word_count:5} "
+                  f"{topics_str[:30]:30}")
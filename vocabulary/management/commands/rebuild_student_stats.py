@@ -0,0 +1,27 @@
+# vocabulary/management/commands/rebuild_student_stats.py
+from django.core.management.base import BaseCommand, CommandError
+from vocabulary.stats import rebuild_student_stats, verify_student_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересборка сводок учеников (StudentStats) по их словам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сравнить сводки со словами, ничего не меняя'
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = verify_student_stats()
+            for student_id, field, stored, actual in mismatches[:50]:
+                self.stdout.write(f'Ученик {student_id}: {field} = {stored}, должно быть {actual}')
+            if mismatches:
+                raise CommandError(f'Расхождений в сводках: {len(mismatches)}')
+            self.stdout.write(self.style.SUCCESS('Сводки совпадают со словами учеников'))
+            return
+
+        total = rebuild_student_stats()
+        self.stdout.write(self.style.SUCCESS(f'Пересобрано сводок: {total}'))
@@ -0,0 +1,24 @@
+# vocabulary/management/commands/rollup_word_attempts.py
+import time
+
+from django.core.management.base import BaseCommand
+from vocabulary.rollup import rollup_word_attempts, ROLLUP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Перенос новых ответов из журнала WordAttempt в статистику слов учеников'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ROLLUP_BATCH_SIZE,
+            help=f'Попыток в одной транзакции (по умолчанию: {ROLLUP_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = rollup_word_attempts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтено попыток: {total} за {time.perf_counter() - started:.2f} с'
+        ))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0011_lettersoupexercise_filler'),
+        ('vocabulary', '0007_studentword_avg_response_time_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordAttemptRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_attempt_id', models.BigIntegerField(default=0, verbose_name='Последняя обработанная попытка')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Свертка попыток',
+                'verbose_name_plural': 'Свертка попыток',
+            },
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='last_attempt_id',
+            field=models.BigIntegerField(default=0, verbose_name='Последняя учтенная попытка'),
+        ),
+        migrations.CreateModel(
+            name='WordAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_correct', models.BooleanField(verbose_name='Правильный ответ')),
+                ('response_time', models.IntegerField(default=0, verbose_name='Время ответа (мс)')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время')),
+                ('exercise', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='word_attempts', to='exercises.exercise')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_attempts', to=settings.AUTH_USER_MODEL)),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='vocabulary.word')),
+            ],
+            options={
+                'verbose_name': 'Попытка ответа',
+                'verbose_name_plural': 'Попытки ответов',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['student', 'word', 'created_at'], name='vocabulary__student_73025a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:24
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0008_word_attempt_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentword',
+            name='ease_factor',
+            field=models.FloatField(default=2.5, verbose_name='Коэффициент легкости'),
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='next_review',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True, verbose_name='Следующее повторение'),
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='review_count',
+            field=models.IntegerField(default=0, verbose_name='Повторений подряд'),
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='review_interval',
+            field=models.IntegerField(default=0, verbose_name='Интервал повторения (дней)'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'next_review'], name='vocabulary__student_ac4da3_idx'),
+        ),
+    ]
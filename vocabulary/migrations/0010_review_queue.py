@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_review_order(apps, schema_editor):
+    # Доля ошибок и приоритеты тем пока нулевые: место в очереди совпадает с датой повторения
+    StudentWord = apps.get_model('vocabulary', 'StudentWord')
+    StudentWord.objects.update(review_order=F('next_review'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0009_studentword_review_schedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentword',
+            name='recent_error_rate',
+            field=models.FloatField(default=0.0, verbose_name='Доля ошибок в последних ответах'),
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='review_order',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True, verbose_name='Место в очереди повторения'),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='priority',
+            field=models.IntegerField(choices=[(0, 'Обычный'), (1, 'Повышенный'), (2, 'Высокий')], default=0, verbose_name='Приоритет повторения'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'review_order'], name='vocabulary__student_981ead_idx'),
+        ),
+        migrations.RunPython(fill_review_order, migrations.RunPython.noop),
+    ]
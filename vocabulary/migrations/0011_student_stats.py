@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+# Счетчики на момент миграции (не из vocabulary.stats: новые поля сводки
+# сломали бы создание строк исторической модели)
+STATUS_FIELDS = {
+    'new': 'words_new',
+    'learning': 'words_learning',
+    'review': 'words_review',
+    'completed': 'words_completed',
+}
+# (поле уровня владения, минимальная точность %, минимальная серия)
+MASTERY_LEVELS = [
+    ('mastery_master', 90, 5),
+    ('mastery_advanced', 80, 3),
+    ('mastery_intermediate', 70, 0),
+    ('mastery_beginner', 50, 0),
+]
+
+
+def build_student_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    StudentWord = apps.get_model('vocabulary', 'StudentWord')
+    StudentStats = apps.get_model('vocabulary', 'StudentStats')
+
+    student_words = StudentWord.objects.alias(
+        accuracy=Case(
+            When(times_attempted=0, then=Value(0.0)),
+            default=F('times_correct') * 100.0 / F('times_attempted'),
+            output_field=FloatField()
+        ),
+    ).alias(
+        mastery=Case(
+            When(times_attempted=0, then=Value('mastery_none')),
+            *[
+                When(accuracy__gte=min_accuracy, current_streak__gte=min_streak, then=Value(field))
+                for field, min_accuracy, min_streak in MASTERY_LEVELS
+            ],
+            default=Value('mastery_novice'),
+        ),
+    )
+    counters = {
+        'total_words': Count('id'),
+        **{field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()},
+        **{
+            field: Count('id', filter=Q(mastery=field))
+            for field in ['mastery_none', 'mastery_novice'] + [level[0] for level in MASTERY_LEVELS]
+        },
+        'attempts': Coalesce(Sum('times_attempted'), 0),
+        'correct': Coalesce(Sum('times_correct'), 0),
+        'wrong': Coalesce(Sum('times_wrong'), 0),
+        'total_response_time': Coalesce(Sum('total_response_time'), 0),
+        'sum_avg_response_time': Coalesce(Sum('avg_response_time'), 0.0),
+    }
+    rows = student_words.order_by().values('student_id').annotate(
+        **{f'stat_{field}': expression for field, expression in counters.items()}
+    )
+    totals = {row['student_id']: {field: row[f'stat_{field}'] for field in counters} for row in rows}
+
+    student_ids = set(User.objects.filter(role='student').values_list('id', flat=True)) | set(totals)
+    StudentStats.objects.bulk_create([
+        StudentStats(student_id=student_id, **totals.get(student_id, {}))
+        for student_id in student_ids
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('vocabulary', '0010_review_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_words', models.IntegerField(default=0, verbose_name='Слов')),
+                ('words_new', models.IntegerField(default=0, verbose_name='Новых')),
+                ('words_learning', models.IntegerField(default=0, verbose_name='Изучается')),
+                ('words_review', models.IntegerField(default=0, verbose_name='На повторении')),
+                ('words_completed', models.IntegerField(default=0, verbose_name='Изучено')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Попыток ответа')),
+                ('correct', models.IntegerField(default=0, verbose_name='Правильных ответов')),
+                ('wrong', models.IntegerField(default=0, verbose_name='Неправильных ответов')),
+                ('total_response_time', models.BigIntegerField(default=0, verbose_name='Общее время ответов (мс)')),
+                ('sum_avg_response_time', models.FloatField(default=0.0, verbose_name='Сумма средних времен ответа (мс)')),
+                ('mastery_none', models.IntegerField(default=0, verbose_name='Не изучено')),
+                ('mastery_novice', models.IntegerField(default=0, verbose_name='Новичок')),
+                ('mastery_beginner', models.IntegerField(default=0, verbose_name='Начинающий')),
+                ('mastery_intermediate', models.IntegerField(default=0, verbose_name='Средний')),
+                ('mastery_advanced', models.IntegerField(default=0, verbose_name='Продвинутый')),
+                ('mastery_master', models.IntegerField(default=0, verbose_name='Мастер')),
+            ],
+            options={
+                'verbose_name': 'Сводка ученика',
+                'verbose_name_plural': 'Сводки учеников',
+            },
+        ),
+        migrations.RunPython(build_student_stats, migrations.RunPython.noop),
+    ]
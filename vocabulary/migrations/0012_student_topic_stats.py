@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def build_topic_stats(apps, schema_editor):
+    # Счетчики на момент миграции, без vocabulary.stats (см. 0011)
+    StudentWord = apps.get_model('vocabulary', 'StudentWord')
+    StudentTopicStats = apps.get_model('vocabulary', 'StudentTopicStats')
+
+    rows = StudentWord.objects.filter(word__topic__isnull=False).order_by().values(
+        'student_id', 'word__topic_id'
+    ).annotate(
+        stat_total_words=Count('id'),
+        stat_words_completed=Count('id', filter=Q(status='completed')),
+        stat_attempts=Coalesce(Sum('times_attempted'), 0),
+        stat_correct=Coalesce(Sum('times_correct'), 0),
+    )
+    StudentTopicStats.objects.bulk_create([
+        StudentTopicStats(
+            student_id=row['student_id'],
+            topic_id=row['word__topic_id'],
+            total_words=row['stat_total_words'],
+            words_completed=row['stat_words_completed'],
+            attempts=row['stat_attempts'],
+            correct=row['stat_correct'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0011_student_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentTopicStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_words', models.IntegerField(default=0, verbose_name='Слов')),
+                ('words_completed', models.IntegerField(default=0, verbose_name='Изучено')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Попыток ответа')),
+                ('correct', models.IntegerField(default=0, verbose_name='Правильных ответов')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_stats', to=settings.AUTH_USER_MODEL)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_stats', to='vocabulary.topic')),
+            ],
+            options={
+                'verbose_name': 'Прогресс по теме',
+                'verbose_name_plural': 'Прогресс по темам',
+                'unique_together': {('student', 'topic')},
+            },
+        ),
+        migrations.RunPython(build_topic_stats, migrations.RunPython.noop),
+    ]
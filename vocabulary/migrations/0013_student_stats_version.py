@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0012_student_topic_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentstats',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Версия данных'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0013_student_stats_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', '-assigned_at', '-id'], name='vocabulary__student_bbfbdb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'status', '-assigned_at', '-id'], name='vocabulary__student_15d3bf_idx'),
+        ),
+    ]
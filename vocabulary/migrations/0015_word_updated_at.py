@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0014_student_word_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentword',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Обновлено'),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Обновлено'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'updated_at'], name='vocabulary__student_b3c79b_idx'),
+        ),
+    ]
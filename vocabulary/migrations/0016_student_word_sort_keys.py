@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_sort_keys(apps, schema_editor):
+    StudentWord = apps.get_model('vocabulary', 'StudentWord')
+    Word = apps.get_model('vocabulary', 'Word')
+    words = Word.objects.filter(pk=OuterRef('word_id'))
+    StudentWord.objects.update(
+        sort_russian=Subquery(words.values('russian')),
+        sort_english=Subquery(words.values('english')),
+        sort_topic=Coalesce(Subquery(words.values('topic__name')), Value('')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vocabulary', '0015_word_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentword',
+            name='sort_english',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='English (для сортировки)'),
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='sort_russian',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='Русский (для сортировки)'),
+        ),
+        migrations.AddField(
+            model_name='studentword',
+            name='sort_topic',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='Тема (для сортировки)'),
+        ),
+        migrations.RunPython(fill_sort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'sort_russian', 'sort_english'], name='vocabulary__student_6038aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'status', 'sort_russian', 'sort_english'], name='vocabulary__student_eccb00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'sort_topic', 'sort_russian', 'sort_english'], name='vocabulary__student_c0c6da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentword',
+            index=models.Index(fields=['student', 'status', 'sort_topic', 'sort_russian', 'sort_english'], name='vocabulary__student_3c39eb_idx'),
+        ),
+    ]
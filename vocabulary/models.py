@@ -1,12 +1,22 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Cast, Greatest
 from django.conf import settings
 from django.utils import timezone
 from users.models import User
+from . import scheduler
 
 
 class Topic(models.Model):
+    PRIORITY_CHOICES = (
+        (0, 'Обычный'),
+        (1, 'Повышенный'),
+        (2, 'Высокий'),
+    )
+
     name = models.CharField("Название темы", max_length=100)
     color = models.CharField("Цвет (HEX)", max_length=7, default="#3B82F6")
+    priority = models.IntegerField("Приоритет повторения", choices=PRIORITY_CHOICES, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -17,6 +27,31 @@ class Topic(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        from .stats import bump_student_versions
+
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        # Приоритет темы влияет на очередь повторения ее слов,
+        # название и цвет — на кабинеты учеников
+        if not adding:
+            student_words = StudentWord.objects.filter(word__topic=self)
+            scheduler.refresh_review_queue(student_words)
+            bump_student_versions(student_words.order_by().values_list('student_id', flat=True).distinct())
+            self.touch_words()
+
+    def touch_words(self, deleting=False):
+        """
+        Отмечает слова темы измененными: название и цвет темы входят в
+        списки слов API, название — в ключ сортировки StudentWord.sort_topic.
+        deleting=True — тема удаляется, и слова останутся без темы.
+        """
+        now = timezone.now()
+        Word.objects.filter(topic=self).update(updated_at=now)
+        StudentWord.objects.filter(word__topic=self).update(
+            updated_at=now, sort_topic='' if deleting else self.name
+        )
+
 
 class Word(models.Model):
     russian = models.CharField("Русский", max_length=100)
@@ -29,6 +64,8 @@ class Word(models.Model):
         related_name='words'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Для синхронизации списков слов (?since= в API), включая смену темы
+    updated_at = models.DateTimeField("Обновлено", auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('russian', 'english')
@@ -37,9 +74,32 @@ class Word(models.Model):
         verbose_name_plural = "Слова"
 
     def save(self, *args, **kwargs):
+        from .stats import bump_student_versions, move_word_topic
+
         self.english = self.english.strip().lower()
         self.russian = self.russian.strip().lower()
-        super().save(*args, **kwargs)
+
+        # Смена темы переносит слово между строками StudentTopicStats
+        with transaction.atomic():
+            adding = self._state.adding
+            if not adding:
+                old_topic_id = Word.objects.filter(pk=self.pk).values_list('topic_id', flat=True).first()
+            super().save(*args, **kwargs)
+            if not adding and old_topic_id != self.topic_id:
+                move_word_topic(self, old_topic_id)
+                # Приоритет новой темы сдвигает слово в очереди повторения
+                scheduler.refresh_review_queue(StudentWord.objects.filter(word=self))
+            if not adding:
+                bump_student_versions(StudentWord.objects.filter(word=self).values_list('student_id', flat=True))
+                StudentWord.objects.filter(word=self).update(updated_at=self.updated_at, **self.sort_keys())
+
+    def sort_keys(self):
+        """Ключи сортировки списка слов ученика (копии в StudentWord)"""
+        return {
+            'sort_russian': self.russian,
+            'sort_english': self.english,
+            'sort_topic': self.topic.name if self.topic_id else '',
+        }
 
     def __str__(self):
         return f"{self.russian} → {self.english}"
@@ -88,49 +148,233 @@ class StudentWord(models.Model):
     first_seen = models.DateTimeField("Первое знакомство", auto_now_add=True)
     last_interaction = models.DateTimeField("Последнее взаимодействие", auto_now=True)
 
+    # ID последней попытки WordAttempt, учтенной в счетчиках
+    last_attempt_id = models.BigIntegerField("Последняя учтенная попытка", default=0)
+
+    # Интервальное повторение (SM-2, см. scheduler.py)
+    review_count = models.IntegerField("Повторений подряд", default=0)
+    review_interval = models.IntegerField("Интервал повторения (дней)", default=0)
+    ease_factor = models.FloatField("Коэффициент легкости", default=scheduler.INITIAL_EASE)
+    next_review = models.DateTimeField("Следующее повторение", null=True, blank=True, default=timezone.now)
+    recent_error_rate = models.FloatField("Доля ошибок в последних ответах", default=0.0)
+    review_order = models.DateTimeField("Место в очереди повторения", null=True, blank=True, default=timezone.now)
+
+    # Последнее изменение строки, ее слова или темы — для ?since= в API
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+
+    # Копии слова и названия темы: сортировка списка слов ученика по
+    # индексу (см. WORD_LIST_ORDERS). Обновляются при сохранении слова и темы
+    sort_russian = models.CharField("Русский (для сортировки)", max_length=100, default='', editable=False)
+    sort_english = models.CharField("English (для сортировки)", max_length=100, default='', editable=False)
+    sort_topic = models.CharField("Тема (для сортировки)", max_length=100, default='', editable=False)
+
     class Meta:
         unique_together = ('student', 'word')
         ordering = ['-assigned_at']
+        indexes = [
+            models.Index(fields=['student', 'next_review']),
+            models.Index(fields=['student', 'review_order']),
+            # Список слов ученика по дате, в том числе с фильтром по статусу
+            models.Index(fields=['student', '-assigned_at', '-id']),
+            models.Index(fields=['student', 'status', '-assigned_at', '-id']),
+            models.Index(fields=['student', 'updated_at']),
+            # Список слов ученика по алфавиту и по темам
+            models.Index(fields=['student', 'sort_russian', 'sort_english']),
+            models.Index(fields=['student', 'status', 'sort_russian', 'sort_english']),
+            models.Index(fields=['student', 'sort_topic', 'sort_russian', 'sort_english']),
+            models.Index(fields=['student', 'status', 'sort_topic', 'sort_russian', 'sort_english']),
+        ]
         verbose_name = "Назначенное слово"
         verbose_name_plural = "Назначенные слова"
 
     def __str__(self):
         return f"{self.student} ← {self.word}"
 
-    def update_statistics(self, is_correct=True, response_time=0):
-        """Обновление статистики после взаимодействия со словом"""
-        self.times_seen += 1
-        self.times_attempted += 1
-        self.total_response_time += response_time
+    def save(self, *args, **kwargs):
+        from .stats import record_student_word_changes
+
+        # Сводка StudentStats обновляется в той же транзакции
+        with transaction.atomic():
+            before = None
+            if not self._state.adding:
+                before = StudentWord.objects.select_related('word').select_for_update(of=('self',)).filter(pk=self.pk).first()
+            else:
+                for field, value in self.word.sort_keys().items():
+                    setattr(self, field, value)
+            super().save(*args, **kwargs)
+            # Место в очереди: дата повторения, доля ошибок и приоритет темы слова
+            scheduler.refresh_review_queue(StudentWord.objects.filter(pk=self.pk))
+            record_student_word_changes([(before, self)])
+
+    # Поля, которые меняет statistics_expressions
+    STATISTICS_FIELDS = [
+        'times_seen', 'times_attempted', 'times_correct', 'times_wrong',
+        'total_response_time', 'avg_response_time', 'current_streak',
+        'longest_streak', 'last_correct_date', 'status', 'last_interaction',
+        'review_count', 'review_interval', 'ease_factor', 'next_review',
+        'recent_error_rate', 'updated_at',
+    ]
+
+    def record_attempt(self, is_correct=True, response_time=0, exercise=None):
+        """
+        Записывает ответ в журнал WordAttempt.
+
+        Если settings.WORD_STATS_ROLLUP выключен, счетчики обновляются
+        сразу, иначе — командой rollup_word_attempts.
+        """
+        with transaction.atomic():
+            attempt = WordAttempt.objects.create(
+                student_id=self.student_id,
+                word_id=self.word_id,
+                exercise=exercise,
+                is_correct=is_correct,
+                response_time=int(response_time)
+            )
+            if not getattr(settings, 'WORD_STATS_ROLLUP', False):
+                self.update_statistics(is_correct, response_time, attempt_id=attempt.id)
+        return attempt
+
+    def update_statistics(self, is_correct=True, response_time=0, attempt_id=None):
+        """
+        Обновление статистики после взаимодействия со словом.
+
+        attempt_id — попытка WordAttempt, которая учитывается этим ответом.
+        Как и почему применяется ответ — см. update_statistics_many.
+        """
+        updated, _ = StudentWord.update_statistics_many([(self.pk, is_correct, response_time, attempt_id, None)])
+        if self.pk in updated:
+            for field in self.STATISTICS_FIELDS + ['last_attempt_id', 'review_order']:
+                setattr(self, field, getattr(updated[self.pk], field))
+
+    @classmethod
+    def update_statistics_many(cls, attempts, skip_counted=False):
+        """
+        Применяет ответы к статистике слов.
+
+        Каждый ответ — один UPDATE по выражениям statistics_expressions:
+        значения считает база данных, поэтому одновременные запросы не
+        перезаписывают счетчики друг друга даже без блокировки строк
+        (в SQLite select_for_update ничего не делает). Строки до и после
+        ответов читаются по одному разу — для приращений сводок
+        StudentStats в той же транзакции.
+
+        Args:
+            attempts: [(ID StudentWord, is_correct, response_time, attempt_id, answered_at), ...]
+                      в порядке ответов; attempt_id и answered_at могут быть None
+            skip_counted: не применять попытку, если last_attempt_id слова
+                          не меньше ее ID (свертка журнала: учтенное не считается дважды)
+
+        Returns:
+            ({ID: StudentWord после обновления}, количество примененных ответов)
+        """
+        from .stats import record_student_word_changes
+
+        applied = 0
+        with transaction.atomic(savepoint=False):
+            before = {
+                student_word.pk: student_word
+                for student_word in cls.objects.select_related('word').select_for_update(of=('self',)).filter(
+                    pk__in={attempt[0] for attempt in attempts}
+                )
+            }
+
+            updated_ids = set()
+            for pk, is_correct, response_time, attempt_id, answered_at in attempts:
+                values = cls.statistics_expressions(is_correct, response_time, answered_at)
+                values['review_order'] = scheduler.queue_expression(values['next_review'], values['recent_error_rate'])
+                rows = cls.objects.filter(pk=pk)
+                if attempt_id is not None:
+                    values['last_attempt_id'] = Greatest('last_attempt_id', Value(attempt_id))
+                    if skip_counted:
+                        rows = rows.filter(last_attempt_id__lt=attempt_id)
+                if rows.update(**values):
+                    updated_ids.add(pk)
+                    applied += 1
+
+            if not updated_ids:
+                return {}, 0
+            updated = {
+                student_word.pk: student_word
+                for student_word in cls.objects.select_related('word').filter(pk__in=updated_ids)
+            }
+            record_student_word_changes([
+                (before[pk], student_word) for pk, student_word in updated.items() if pk in before
+            ])
+        return updated, applied
+
+    @staticmethod
+    def statistics_expressions(is_correct=True, response_time=0, answered_at=None):
+        """
+        Значения UPDATE, применяющие ответ к статистике слова.
+
+        Выражения ссылаются на значения строки до обновления (так
+        вычисляет UPDATE в SQLite и PostgreSQL), поэтому условия статуса
+        сдвинуты на единицу: times_correct >= 4 означает >= 5 после ответа.
+        answered_at — время ответа (по умолчанию — сейчас).
+        """
+        now = timezone.now()
+        answered_at = answered_at or now
+        response_time = int(response_time)
+        attempted = F('times_attempted') + 1
+        total_response_time = F('total_response_time') + response_time
+
+        values = {
+            'times_seen': F('times_seen') + 1,
+            'times_attempted': attempted,
+            'total_response_time': total_response_time,
+            'avg_response_time': Cast(total_response_time, models.FloatField()) / attempted,
+            'last_interaction': answered_at,
+            'updated_at': now,
+            'recent_error_rate': scheduler.error_rate_expression(is_correct),
+            **scheduler.schedule_expressions(is_correct, response_time, answered_at),
+        }
 
         if is_correct:
-            self.times_correct += 1
-            self.current_streak += 1
-            self.last_correct_date = timezone.now()
-
-            # Обновляем лучшую серию
-            if self.current_streak > self.longest_streak:
-                self.longest_streak = self.current_streak
-
-            # Автоматически обновляем статус на основе статистики
-            if self.times_correct >= 5 and self.current_streak >= 3:
-                self.status = 'completed'
-            elif self.times_correct >= 2:
-                self.status = 'learning'
+            streak = F('current_streak') + 1
+            values.update(
+                times_correct=F('times_correct') + 1,
+                current_streak=streak,
+                longest_streak=Greatest('longest_streak', streak),
+                last_correct_date=answered_at,
+                status=Case(
+                    When(times_correct__gte=4, current_streak__gte=2, then=Value('completed')),
+                    When(times_correct__gte=1, then=Value('learning')),
+                    default=F('status'),
+                ),
+            )
         else:
-            self.times_wrong += 1
-            self.current_streak = 0
+            values.update(
+                times_wrong=F('times_wrong') + 1,
+                current_streak=0,
+                status=Case(
+                    When(status='completed', then=Value('review')),
+                    default=F('status'),
+                ),
+            )
 
-            if self.status == 'completed' and self.current_streak == 0:
-                self.status = 'review'
+        return values
 
-        # Обновляем среднее время ответа
-        if self.times_attempted > 0:
-            self.avg_response_time = self.total_response_time / self.times_attempted
+    def stats_contribution(self):
+        """Вклад слова в сводку StudentStats: {поле: значение}"""
+        return {
+            'total_words': 1,
+            StudentStats.STATUS_FIELDS[self.status]: 1,
+            StudentStats.MASTERY_FIELDS[self.get_mastery_level()]: 1,
+            'attempts': self.times_attempted,
+            'correct': self.times_correct,
+            'wrong': self.times_wrong,
+            'total_response_time': self.total_response_time,
+            'sum_avg_response_time': self.avg_response_time,
+        }
 
-        # Обновляем дату последнего взаимодействия
-        self.last_interaction = timezone.now()
-        self.save()
+    def topic_stats_contribution(self):
+        """Вклад слова в прогресс по теме StudentTopicStats: {поле: значение}"""
+        return {
+            'total_words': 1,
+            'words_completed': 1 if self.status == 'completed' else 0,
+            'attempts': self.times_attempted,
+            'correct': self.times_correct,
+        }
 
     def get_accuracy_percentage(self):
         """Возвращает процент правильных ответов"""
@@ -139,11 +383,10 @@ class StudentWord(models.Model):
         return (self.times_correct / self.times_attempted) * 100
 
     def get_days_since_last_seen(self):
-        """Возвращает количество дней с последнего взаимодействия"""
+        """Возвращает количество календарных дней с последнего взаимодействия"""
         if not self.last_interaction:
             return None
-        delta = timezone.now() - self.last_interaction
-        return delta.days
+        return (timezone.localdate() - timezone.localdate(self.last_interaction)).days
 
     def get_mastery_level(self):
         """Определяет уровень владения словом"""
@@ -173,4 +416,190 @@ class StudentWord(models.Model):
         self.current_streak = 0
         self.status = 'new'
         self.last_correct_date = None
+        self.review_count = 0
+        self.review_interval = 0
+        self.ease_factor = scheduler.INITIAL_EASE
+        self.next_review = timezone.now()
+        self.recent_error_rate = 0.0
         self.save()
+
+
+class WordAttempt(models.Model):
+    """
+    Журнал ответов учеников: строки только добавляются.
+
+    Счетчики StudentWord строятся из журнала — сразу при ответе или
+    командой rollup_word_attempts (см. settings.WORD_STATS_ROLLUP).
+    """
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='word_attempts'
+    )
+    word = models.ForeignKey('Word', on_delete=models.CASCADE, related_name='attempts')
+    exercise = models.ForeignKey(
+        'exercises.Exercise',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='word_attempts'
+    )
+    is_correct = models.BooleanField("Правильный ответ")
+    response_time = models.IntegerField("Время ответа (мс)", default=0)
+    created_at = models.DateTimeField("Время", default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['student', 'word', 'created_at'])]
+        verbose_name = "Попытка ответа"
+        verbose_name_plural = "Попытки ответов"
+
+    def __str__(self):
+        return f"{self.student} → {self.word} ({'верно' if self.is_correct else 'неверно'})"
+
+
+class WordAttemptRollup(models.Model):
+    """
+    Отметка свертки журнала: все попытки с ID не больше last_attempt_id
+    уже учтены в счетчиках StudentWord. Одна строка.
+    """
+    last_attempt_id = models.BigIntegerField("Последняя обработанная попытка", default=0)
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+
+    class Meta:
+        verbose_name = "Свертка попыток"
+        verbose_name_plural = "Свертка попыток"
+
+    def __str__(self):
+        return f"Свертка до попытки {self.last_attempt_id}"
+
+
+class StudentStats(models.Model):
+    """
+    Сводка по словам ученика: одна строка на ученика.
+
+    Обновляется приращениями в той же транзакции, что и изменение
+    StudentWord (см. stats.record_student_word_changes); пересобрать и
+    проверить таблицу можно командой rebuild_student_stats.
+    """
+    # Статус слова → поле счетчика
+    STATUS_FIELDS = {
+        'new': 'words_new',
+        'learning': 'words_learning',
+        'review': 'words_review',
+        'completed': 'words_completed',
+    }
+    # Уровень владения (StudentWord.get_mastery_level) → поле счетчика
+    MASTERY_FIELDS = {
+        'Не изучено': 'mastery_none',
+        'Новичок': 'mastery_novice',
+        'Начинающий': 'mastery_beginner',
+        'Средний': 'mastery_intermediate',
+        'Продвинутый': 'mastery_advanced',
+        'Мастер': 'mastery_master',
+    }
+
+    student = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    total_words = models.IntegerField("Слов", default=0)
+    words_new = models.IntegerField("Новых", default=0)
+    words_learning = models.IntegerField("Изучается", default=0)
+    words_review = models.IntegerField("На повторении", default=0)
+    words_completed = models.IntegerField("Изучено", default=0)
+
+    attempts = models.IntegerField("Попыток ответа", default=0)
+    correct = models.IntegerField("Правильных ответов", default=0)
+    wrong = models.IntegerField("Неправильных ответов", default=0)
+    total_response_time = models.BigIntegerField("Общее время ответов (мс)", default=0)
+    # Сумма средних времен ответа по словам (для среднего по словам)
+    sum_avg_response_time = models.FloatField("Сумма средних времен ответа (мс)", default=0.0)
+
+    # Распределение слов по уровням владения
+    mastery_none = models.IntegerField("Не изучено", default=0)
+    mastery_novice = models.IntegerField("Новичок", default=0)
+    mastery_beginner = models.IntegerField("Начинающий", default=0)
+    mastery_intermediate = models.IntegerField("Средний", default=0)
+    mastery_advanced = models.IntegerField("Продвинутый", default=0)
+    mastery_master = models.IntegerField("Мастер", default=0)
+
+    # Растет при каждом изменении слов, заданий и профиля ученика;
+    # входит в ключ кэша фрагментов кабинетов (см. bump_student_versions)
+    version = models.PositiveIntegerField("Версия данных", default=0)
+
+    class Meta:
+        verbose_name = "Сводка ученика"
+        verbose_name_plural = "Сводки учеников"
+
+    def __str__(self):
+        return f"Сводка {self.student}"
+
+    @classmethod
+    def counter_fields(cls):
+        return [field.name for field in cls._meta.concrete_fields if field.name not in ('student', 'version')]
+
+    def get_accuracy_percentage(self):
+        """Процент правильных ответов"""
+        if self.attempts == 0:
+            return 0
+        return round(self.correct / self.attempts * 100, 1)
+
+    def get_avg_response_time(self):
+        """Среднее по словам время ответа (мс)"""
+        if self.total_words == 0:
+            return 0
+        return self.sum_avg_response_time / self.total_words
+
+    def get_mastery_levels(self):
+        """{уровень: количество слов} без пустых уровней"""
+        levels = {}
+        for level, field in self.MASTERY_FIELDS.items():
+            if getattr(self, field):
+                levels[level] = getattr(self, field)
+        return levels
+
+
+class StudentTopicStats(models.Model):
+    """
+    Прогресс ученика по теме: одна строка на пару (ученик, тема).
+
+    Обновляется приращениями вместе со StudentStats, а также при смене
+    темы слова. Слова без темы не учитываются.
+    """
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='topic_stats'
+    )
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='student_stats')
+    total_words = models.IntegerField("Слов", default=0)
+    words_completed = models.IntegerField("Изучено", default=0)
+    attempts = models.IntegerField("Попыток ответа", default=0)
+    correct = models.IntegerField("Правильных ответов", default=0)
+
+    class Meta:
+        unique_together = ('student', 'topic')
+        verbose_name = "Прогресс по теме"
+        verbose_name_plural = "Прогресс по темам"
+
+    def __str__(self):
+        return f"{self.student} — {self.topic}"
+
+    @classmethod
+    def counter_fields(cls):
+        return ['total_words', 'words_completed', 'attempts', 'correct']
+
+    def get_accuracy_percentage(self):
+        """Процент правильных ответов по теме"""
+        if self.attempts == 0:
+            return 0
+        return round(self.correct / self.attempts * 100, 1)
+
+    def get_completed_percentage(self):
+        """Процент изученных слов темы"""
+        if self.total_words == 0:
+            return 0
+        return int(self.words_completed / self.total_words * 100)
@@ -0,0 +1,131 @@
+# vocabulary/pagination.py
+"""
+Постраничный вывод по ключу сортировки (keyset / seek).
+
+Следующая страница выбирается условием «строки после последней
+показанной» по ключу сортировки, а не через OFFSET, поэтому страница
+читается поиском по индексу и стоит одинаково при любом ее номере.
+Позиция передается в запросе непрозрачным курсором — значениями ключа
+последней (или первой) строки страницы.
+
+Ключ — список (поле, по убыванию); поля должны быть доступны у строк
+результата (поле модели, аннотация или ключ словаря для values()) и
+вместе однозначно задавать порядок строк.
+"""
+import base64
+import json
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def _encode_value(value):
+    # Даты — полностью, с микросекундами: иначе курсор не совпадет со строкой
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Значение ключа не сериализуется: {value!r}')
+
+
+def encode_cursor(values):
+    """Курсор для значений ключа"""
+    raw = json.dumps(list(values), default=_encode_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    """
+    Значения ключа из курсора.
+
+    Raises:
+        ValueError: если курсор поврежден или не подходит к ключу
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError):
+        raise ValueError('Неверный курсор')
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError('Неверный курсор')
+    return values
+
+
+def _seek(queryset, keys, cursor, backwards=False):
+    try:
+        return queryset.filter(seek_condition(keys, decode_cursor(cursor, keys), backwards))
+    except (TypeError, ValidationError):
+        # Значения в курсоре не подходят к полям ключа
+        raise ValueError('Неверный курсор')
+
+
+def seek_condition(keys, values, backwards=False):
+    """
+    Q-условие «строка после values в порядке keys»:
+    (k1 > v1) OR (k1 = v1 AND (k2 > v2 OR ...)), для полей по убыванию — «<».
+    backwards=True — строки до values.
+
+    Дополнительное k1 >= v1 дублирует условие, но дает базе диапазон
+    для поиска по индексу (по OR индекс не используется).
+    """
+    condition = None
+    for (field, descending), value in reversed(list(zip(keys, values))):
+        lookup = 'lt' if descending != backwards else 'gt'
+        term = Q(**{f'{field}__{lookup}': value})
+        if condition is not None:
+            term |= Q(**{field: value}) & condition
+        condition = term
+    # После цикла lookup относится к первому полю ключа
+    return Q(**{f'{keys[0][0]}__{lookup}e': values[0]}) & condition
+
+
+def row_key(row, keys):
+    if isinstance(row, dict):
+        return [row[field] for field, _ in keys]
+    return [getattr(row, field) for field, _ in keys]
+
+
+class KeysetPage:
+    """Страница строк с курсорами соседних страниц"""
+
+    def __init__(self, items, keys, has_next, has_previous):
+        self.items = items
+        self.has_next = has_next and bool(items)
+        self.has_previous = has_previous and bool(items)
+        self.next_cursor = encode_cursor(row_key(items[-1], keys)) if self.has_next else None
+        self.previous_cursor = encode_cursor(row_key(items[0], keys)) if self.has_previous else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def keyset_page(queryset, keys, per_page, after=None, before=None):
+    """
+    Одна страница queryset в порядке keys.
+
+    Args:
+        queryset: Отфильтрованный queryset (порядок задается здесь)
+        keys: [(поле, по убыванию), ...]
+        per_page: Строк на странице
+        after: Курсор — страница после него (вперед)
+        before: Курсор — страница перед ним (назад)
+
+    Raises:
+        ValueError: если курсор неверный
+    """
+    ordering = [f'-{field}' if descending else field for field, descending in keys]
+
+    if before:
+        # Назад: читаем в обратном порядке и разворачиваем страницу
+        reverse = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        rows = list(_seek(queryset, keys, before, backwards=True).order_by(*reverse)[:per_page + 1])
+        return KeysetPage(rows[:per_page][::-1], keys, has_next=True, has_previous=len(rows) > per_page)
+
+    if after:
+        queryset = _seek(queryset, keys, after)
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    return KeysetPage(rows[:per_page], keys, has_next=len(rows) > per_page, has_previous=bool(after))
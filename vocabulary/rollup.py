@@ -0,0 +1,71 @@
+# vocabulary/rollup.py
+from django.db import transaction
+
+from .models import StudentWord, WordAttempt, WordAttemptRollup
+
+ROLLUP_BATCH_SIZE = 5000
+
+
+def rollup_word_attempts(batch_size=ROLLUP_BATCH_SIZE):
+    """
+    Переносит новые попытки из журнала WordAttempt в счетчики StudentWord.
+
+    Обрабатываются только попытки после отметки WordAttemptRollup, пачками
+    по batch_size в отдельных транзакциях. Попытки, уже учтенные при
+    ответе (ID не больше StudentWord.last_attempt_id), пропускаются,
+    поэтому повторный запуск ничего не считает дважды.
+
+    Returns:
+        Количество учтенных попыток
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            state, _ = WordAttemptRollup.objects.select_for_update().get_or_create(pk=1)
+            attempts = list(
+                WordAttempt.objects
+                .filter(id__gt=state.last_attempt_id)
+                .order_by('id')[:batch_size]
+            )
+            if not attempts:
+                return total
+
+            total += apply_word_attempts(attempts, skip_counted=True)
+
+            state.last_attempt_id = attempts[-1].id
+            state.save()
+
+
+def apply_word_attempts(attempts, skip_counted=False):
+    """
+    Применяет попытки журнала к счетчикам StudentWord (в транзакции
+    вызывающего кода). Попытки слов, которые уже сняты с ученика,
+    пропускаются; при skip_counted — и уже учтенные попытки
+    (см. StudentWord.update_statistics_many).
+
+    Returns:
+        Количество учтенных попыток
+    """
+    student_word_ids = dict(
+        ((student_id, word_id), pk)
+        for pk, student_id, word_id in StudentWord.objects.filter(
+            student_id__in={attempt.student_id for attempt in attempts},
+            word_id__in={attempt.word_id for attempt in attempts}
+        ).values_list('pk', 'student_id', 'word_id')
+    )
+
+    _, applied = StudentWord.update_statistics_many(
+        [
+            (
+                student_word_ids[(attempt.student_id, attempt.word_id)],
+                attempt.is_correct,
+                attempt.response_time,
+                attempt.id,
+                attempt.created_at,
+            )
+            for attempt in attempts
+            if (attempt.student_id, attempt.word_id) in student_word_ids
+        ],
+        skip_counted=skip_counted
+    )
+    return applied
@@ -0,0 +1,169 @@
+# vocabulary/scheduler.py
+"""
+Интервальное повторение слов (алгоритм SM-2).
+
+Каждый ответ получает оценку по шкале SM-2 (0–5). От нее зависят
+коэффициент легкости слова и интервал до следующего повторения.
+Дата повторения StudentWord.next_review проиндексирована вместе с
+учеником, поэтому очередь повторения — один проход по индексу.
+
+Очередь повторения StudentWord.review_order — та же дата, сдвинутая
+раньше для слов с частыми ошибками и слов из приоритетных тем. Она
+пересчитывается при каждом изменении слова, поэтому первые k слов
+очереди читаются по индексу (student, review_order) без сортировки.
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Round
+from django.utils import timezone
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL = 1   # дней после первого правильного ответа
+SECOND_INTERVAL = 6  # дней после второго
+MAX_INTERVAL = 365   # дальше года повторение не откладывается
+
+# Оценки ответа по шкале SM-2
+QUALITY_FAST = 5     # правильно и быстро
+QUALITY_CORRECT = 4  # правильно
+QUALITY_WRONG = 2    # неправильно: повторение начинается заново
+FAST_ANSWER_MS = 5000
+
+# Очередь повторения
+ERROR_RATE_WEIGHT = 0.3  # вес последнего ответа в доле ошибок
+ERROR_PRIORITY_DAYS = 3  # на сколько дней раньше встает слово, на которое всегда ошибаются
+TOPIC_PRIORITY_DAYS = 1  # сдвиг за каждую ступень приоритета темы
+
+
+def review_quality(is_correct, response_time=0):
+    """Оценка ответа по шкале SM-2 (время ответа в мс, 0 — неизвестно)"""
+    if not is_correct:
+        return QUALITY_WRONG
+    if 0 < response_time <= FAST_ANSWER_MS:
+        return QUALITY_FAST
+    return QUALITY_CORRECT
+
+
+def ease_delta(quality):
+    """Изменение коэффициента легкости по формуле SM-2"""
+    return 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+
+
+def next_schedule(review_count, interval, ease_factor, quality):
+    """
+    Шаг SM-2.
+
+    Returns:
+        (review_count, interval, ease_factor) после ответа
+    """
+    if quality >= 3:
+        if review_count == 0:
+            interval = FIRST_INTERVAL
+        elif review_count == 1:
+            interval = SECOND_INTERVAL
+        else:
+            interval = min(max(int(interval * ease_factor + 0.5), 1), MAX_INTERVAL)
+        review_count += 1
+    else:
+        review_count = 0
+        interval = FIRST_INTERVAL
+
+    return review_count, interval, max(ease_factor + ease_delta(quality), MIN_EASE)
+
+
+def schedule_expressions(is_correct, response_time=0, now=None):
+    """
+    Значения для UPDATE, повторяющие next_schedule.
+
+    Как и в StudentWord.statistics_expressions, выражения ссылаются на
+    значения строки до обновления: интервал считается по старому
+    коэффициенту легкости, как того требует SM-2.
+    """
+    now = now or timezone.now()
+    quality = review_quality(is_correct, response_time)
+
+    if quality >= 3:
+        review_count = F('review_count') + 1
+        interval = Case(
+            When(review_count=0, then=Value(FIRST_INTERVAL)),
+            When(review_count=1, then=Value(SECOND_INTERVAL)),
+            default=Least(
+                Greatest(Cast(Round(F('review_interval') * F('ease_factor')), models.IntegerField()), Value(1)),
+                Value(MAX_INTERVAL)
+            ),
+        )
+    else:
+        review_count = Value(0)
+        interval = Value(FIRST_INTERVAL)
+
+    return {
+        'review_count': review_count,
+        'review_interval': interval,
+        'ease_factor': Greatest(F('ease_factor') + ease_delta(quality), Value(MIN_EASE)),
+        'next_review': Value(now, output_field=models.DateTimeField()) + ExpressionWrapper(
+            interval * Value(timedelta(days=1)), output_field=models.DurationField()
+        ),
+    }
+
+
+def next_error_rate(error_rate, is_correct):
+    """Доля ошибок в последних ответах (экспоненциальное сглаживание)"""
+    return error_rate * (1 - ERROR_RATE_WEIGHT) + (0 if is_correct else ERROR_RATE_WEIGHT)
+
+
+def error_rate_expression(is_correct):
+    """Выражение для UPDATE, повторяющее next_error_rate"""
+    return F('recent_error_rate') * (1 - ERROR_RATE_WEIGHT) + (0 if is_correct else ERROR_RATE_WEIGHT)
+
+
+def queue_expression(next_review=None, error_rate=None):
+    """
+    Место слова в очереди: дата повторения минус сдвиг по доле ошибок
+    и приоритету темы. Сдвиг округляется до часов, чтобы умножение на
+    интервал оставалось целочисленным во всех базах.
+    """
+    from .models import Topic
+
+    topic_priority = Subquery(
+        Topic.objects.filter(words=OuterRef('word_id')).order_by().values('priority')[:1]
+    )
+    days = (
+        (F('recent_error_rate') if error_rate is None else error_rate) * ERROR_PRIORITY_DAYS
+        + Coalesce(topic_priority, 0) * TOPIC_PRIORITY_DAYS
+    )
+    return (F('next_review') if next_review is None else next_review) - ExpressionWrapper(
+        Cast(Round(days * 24), models.IntegerField()) * Value(timedelta(hours=1)),
+        output_field=models.DurationField()
+    )
+
+
+def refresh_review_queue(student_words):
+    """Пересчитывает место в очереди для StudentWord из queryset одним UPDATE"""
+    return student_words.update(review_order=queue_expression())
+
+
+def review_queue(student, limit=None, now=None):
+    """
+    Первые limit слов очереди повторения ученика, которым пора на повторение.
+
+    Чтение идет по индексу (student, review_order) и останавливается
+    после limit строк.
+    """
+    queue = student.assigned_words.filter(
+        review_order__lte=now or timezone.now()
+    ).select_related('word', 'word__topic').order_by('review_order')
+    return queue[:limit] if limit else queue
+
+
+def due_words(student, now=None):
+    """
+    Слова ученика, которые пора повторить, начиная с самых просроченных.
+
+    Запрос проходит по индексу (student, next_review); слова с пустой
+    датой повторения (выученные вручную) в очередь не попадают.
+    """
+    return student.assigned_words.filter(
+        next_review__lte=now or timezone.now()
+    ).select_related('word').order_by('next_review')
@@ -0,0 +1,61 @@
+# vocabulary/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from exercises.models import Exercise
+from users.models import User
+from .models import StudentWord, Topic
+from .scheduler import refresh_review_queue
+from .stats import bump_student_versions, record_student_word_changes
+
+
+@receiver(post_delete, sender=StudentWord)
+def student_word_deleted(sender, instance, **kwargs):
+    """Вычитает удаленное слово из сводки (в том числе при каскадном удалении)"""
+    record_student_word_changes([(instance, None)])
+
+
+@receiver(pre_save, sender=Exercise)
+def exercise_student_changing(sender, instance, update_fields=None, **kwargs):
+    """Кабинет прежнего ученика тоже устаревает, если задание передано другому"""
+    if instance._state.adding or (update_fields is not None and 'student' not in update_fields):
+        return
+    old_student_id = Exercise.objects.filter(pk=instance.pk).values_list('student_id', flat=True).first()
+    if old_student_id not in (None, instance.student_id):
+        bump_student_versions([old_student_id])
+
+
+@receiver(post_save, sender=Exercise)
+def exercise_saved(sender, instance, **kwargs):
+    bump_student_versions([instance.student_id])
+
+
+@receiver(post_delete, sender=Exercise)
+def exercise_deleted(sender, instance, **kwargs):
+    """Строка сводки создана при сохранении задания, если ученик не удаляется сам"""
+    bump_student_versions([instance.student_id], create=False)
+
+
+@receiver(post_save, sender=User)
+def student_changed(sender, instance, created, **kwargs):
+    """Имя и последний вход ученика показываются в кабинете учителя"""
+    if instance.is_student() and not created:
+        bump_student_versions([instance.pk])
+
+
+@receiver(pre_delete, sender=Topic)
+def topic_deleting(sender, instance, **kwargs):
+    """Слова удаляемой темы останутся без темы у всех их учеников"""
+    bump_student_versions(
+        StudentWord.objects.filter(word__topic=instance).order_by().values_list('student_id', flat=True).distinct(),
+        create=False
+    )
+    # SET_NULL не вызывает save() слов
+    instance.touch_words(deleting=True)
+    # Приоритет темы уходит из очереди повторения после удаления (topic_deleted)
+    instance._student_word_ids = list(StudentWord.objects.filter(word__topic=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Topic)
+def topic_deleted(sender, instance, **kwargs):
+    refresh_review_queue(StudentWord.objects.filter(pk__in=getattr(instance, '_student_word_ids', [])))
@@ -0,0 +1,357 @@
+# vocabulary/stats.py
+"""
+Сводная статистика ученика по словам.
+
+Итоги по словам ученика хранятся в StudentStats, прогресс по темам — в
+StudentTopicStats. Обе таблицы меняются приращениями вместе с каждым
+изменением StudentWord, поэтому страницы читают готовые строки.
+aggregate_student_words и aggregate_topic_words считают те же итоги
+с нуля — для пересборки и проверки таблиц.
+
+StudentStats.version растет при каждом изменении данных ученика и
+служит ключом кэша фрагментов кабинетов.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from users.models import User
+from .models import StudentStats, StudentTopicStats, StudentWord, Word
+
+# Уровни владения в порядке StudentWord.get_mastery_level
+MASTERY_NONE = 'Не изучено'
+MASTERY_LEVELS = [
+    # (уровень, минимальная точность %, минимальная серия)
+    ('Мастер', 90, 5),
+    ('Продвинутый', 80, 3),
+    ('Средний', 70, 0),
+    ('Начинающий', 50, 0),
+]
+MASTERY_LOWEST = 'Новичок'
+
+
+def with_mastery_level(queryset):
+    """
+    Добавляет к StudentWord псевдоним mastery — уровень владения словом,
+    вычисленный базой данных так же, как StudentWord.get_mastery_level.
+    """
+    return queryset.alias(
+        accuracy=Case(
+            When(times_attempted=0, then=Value(0.0)),
+            default=F('times_correct') * 100.0 / F('times_attempted'),
+            output_field=FloatField()
+        ),
+    ).alias(
+        mastery=Case(
+            When(times_attempted=0, then=Value(MASTERY_NONE)),
+            *[
+                When(accuracy__gte=min_accuracy, current_streak__gte=min_streak, then=Value(level))
+                for level, min_accuracy, min_streak in MASTERY_LEVELS
+            ],
+            default=Value(MASTERY_LOWEST),
+        ),
+    )
+
+
+def aggregate_student_words(queryset):
+    """
+    Итоги StudentStats по ученикам, посчитанные с нуля одним запросом.
+
+    queryset может быть и исторической моделью StudentWord из миграции.
+
+    Returns:
+        {student_id: {поле StudentStats: значение}}
+    """
+    counters = {
+        'total_words': Count('id'),
+        **{field: Count('id', filter=Q(status=status)) for status, field in StudentStats.STATUS_FIELDS.items()},
+        **{field: Count('id', filter=Q(mastery=level)) for level, field in StudentStats.MASTERY_FIELDS.items()},
+        'attempts': Coalesce(Sum('times_attempted'), 0),
+        'correct': Coalesce(Sum('times_correct'), 0),
+        'wrong': Coalesce(Sum('times_wrong'), 0),
+        'total_response_time': Coalesce(Sum('total_response_time'), 0),
+        'sum_avg_response_time': Coalesce(Sum('avg_response_time'), 0.0),
+    }
+    # Имена счетчиков совпадают с полями StudentWord, поэтому нужны псевдонимы
+    rows = with_mastery_level(queryset).order_by().values('student_id').annotate(
+        **{f'stat_{field}': expression for field, expression in counters.items()}
+    )
+    return {
+        row['student_id']: {field: row[f'stat_{field}'] for field in counters}
+        for row in rows
+    }
+
+
+def aggregate_topic_words(queryset):
+    """
+    Итоги StudentTopicStats по парам (ученик, тема), посчитанные с нуля
+    одним запросом. Слова без темы не учитываются.
+
+    Returns:
+        {(student_id, topic_id): {поле StudentTopicStats: значение}}
+    """
+    counters = {
+        'total_words': Count('id'),
+        'words_completed': Count('id', filter=Q(status='completed')),
+        'attempts': Coalesce(Sum('times_attempted'), 0),
+        'correct': Coalesce(Sum('times_correct'), 0),
+    }
+    rows = queryset.filter(word__topic__isnull=False).order_by().values('student_id', 'word__topic_id').annotate(
+        **{f'stat_{field}': expression for field, expression in counters.items()}
+    )
+    return {
+        (row['student_id'], row['word__topic_id']): {field: row[f'stat_{field}'] for field in counters}
+        for row in rows
+    }
+
+
+def _word_topics(student_words):
+    """{word_id: topic_id} для слов (один запрос для слов, не загруженных заранее)"""
+    topics = {
+        student_word.word_id: student_word.word.topic_id
+        for student_word in student_words
+        if StudentWord.word.is_cached(student_word)
+    }
+    missing = {student_word.word_id for student_word in student_words} - set(topics)
+    if missing:
+        topics.update(Word.objects.filter(id__in=missing).values_list('id', 'topic_id'))
+    return topics
+
+
+def _add_contribution(delta, contribution, sign):
+    for field, value in contribution.items():
+        delta[field] += sign * value
+
+
+def _apply_delta(rows, delta):
+    """UPDATE строк сводки приращениями; False, если строки нет"""
+    values = {field: F(field) + value for field, value in delta.items() if value}
+    return not values or bool(rows.update(**values))
+
+
+def record_student_word_changes(changes):
+    """
+    Применяет изменения StudentWord к сводкам StudentStats и
+    StudentTopicStats приращениями.
+
+    Вызывается в транзакции, изменившей слова. Если строки сводки еще
+    нет, она собирается с нуля (изменение к этому моменту уже записано
+    в StudentWord).
+
+    Args:
+        changes: [(before, after), ...] — StudentWord до и после изменения;
+                 before=None — слово назначено, after=None — удалено
+    """
+    student_deltas = defaultdict(lambda: defaultdict(int))
+    topic_deltas = defaultdict(lambda: defaultdict(int))
+    assigned = set()
+    topics = _word_topics([student_word for change in changes for student_word in change if student_word])
+
+    for before, after in changes:
+        for student_word, sign in ((before, -1), (after, 1)):
+            if student_word is None:
+                continue
+            _add_contribution(student_deltas[student_word.student_id], student_word.stats_contribution(), sign)
+            topic_id = topics.get(student_word.word_id)
+            if topic_id is not None:
+                _add_contribution(
+                    topic_deltas[(student_word.student_id, topic_id)],
+                    student_word.topic_stats_contribution(),
+                    sign
+                )
+            if sign > 0:
+                assigned.add(student_word.student_id)
+
+    _record_topic_deltas(topic_deltas, assigned)
+
+    # Версия для кэша кабинетов растет в том же UPDATE
+    for delta in student_deltas.values():
+        delta['version'] = 1
+
+    # После тем: пересборка сводки ученика пересобирает и его темы
+    for student_id, delta in student_deltas.items():
+        updated = _apply_delta(StudentStats.objects.filter(student_id=student_id), delta)
+        if not updated and student_id in assigned:
+            rebuild_student_stats([student_id])
+
+
+def _record_topic_deltas(topic_deltas, assigned):
+    for (student_id, topic_id), delta in topic_deltas.items():
+        rows = StudentTopicStats.objects.filter(student_id=student_id, topic_id=topic_id)
+        if not _apply_delta(rows, delta) and student_id in assigned:
+            totals = aggregate_topic_words(StudentWord.objects.filter(student_id=student_id, word__topic_id=topic_id))
+            StudentTopicStats.objects.create(
+                student_id=student_id, topic_id=topic_id, **totals.get((student_id, topic_id), {})
+            )
+
+
+def move_word_topic(word, old_topic_id):
+    """Переносит вклад слова у всех учеников из старой темы в новую"""
+    topic_deltas = defaultdict(lambda: defaultdict(int))
+    assigned = set()
+    for student_word in StudentWord.objects.select_for_update().filter(word=word):
+        contribution = student_word.topic_stats_contribution()
+        if old_topic_id is not None:
+            _add_contribution(topic_deltas[(student_word.student_id, old_topic_id)], contribution, -1)
+        if word.topic_id is not None:
+            _add_contribution(topic_deltas[(student_word.student_id, word.topic_id)], contribution, 1)
+            assigned.add(student_word.student_id)
+    _record_topic_deltas(topic_deltas, assigned)
+
+
+def bump_student_versions(student_ids, create=True):
+    """
+    Увеличивает StudentStats.version учеников одним UPDATE.
+
+    Вызывается в транзакции изменения, после которого закэшированные
+    фрагменты кабинетов устарели. Ученику без строки сводки она
+    создается, чтобы новая версия отличалась от нулевой по умолчанию.
+
+    Args:
+        student_ids: ID учеников
+        create: False — не создавать недостающие строки (при удалении,
+                когда ученик может удаляться вместе со своими данными)
+    """
+    student_ids = set(student_ids)
+    if not student_ids:
+        return
+    rows = StudentStats.objects.filter(student_id__in=student_ids)
+    if rows.update(version=F('version') + 1) < len(student_ids) and create:
+        missing = list(User.objects.filter(id__in=student_ids, stats__isnull=True).values_list('id', flat=True))
+        if missing:
+            rebuild_student_stats(missing)
+
+
+def rebuild_student_stats(student_ids=None):
+    """
+    Пересобирает строки StudentStats и StudentTopicStats с нуля.
+    Версия данных ученика при этом увеличивается, а не сбрасывается.
+
+    Args:
+        student_ids: ID учеников (None — все ученики и все, у кого есть слова)
+
+    Returns:
+        Количество строк сводки учеников
+    """
+    student_words = StudentWord.objects.all()
+    if student_ids is not None:
+        student_words = student_words.filter(student_id__in=student_ids)
+
+    with transaction.atomic():
+        totals = aggregate_student_words(student_words)
+        topic_totals = aggregate_topic_words(student_words)
+        if student_ids is None:
+            student_ids = set(User.objects.filter(role='student').values_list('id', flat=True)) | set(totals)
+            rows = StudentStats.objects.all()
+            topic_rows = StudentTopicStats.objects.all()
+        else:
+            rows = StudentStats.objects.filter(student_id__in=student_ids)
+            topic_rows = StudentTopicStats.objects.filter(student_id__in=student_ids)
+        versions = dict(rows.values_list('student_id', 'version'))
+        rows.delete()
+        topic_rows.delete()
+
+        StudentStats.objects.bulk_create([
+            StudentStats(
+                student_id=student_id,
+                version=versions.get(student_id, 0) + 1,
+                **totals.get(student_id, {})
+            )
+            for student_id in student_ids
+        ])
+        StudentTopicStats.objects.bulk_create([
+            StudentTopicStats(student_id=student_id, topic_id=topic_id, **values)
+            for (student_id, topic_id), values in topic_totals.items()
+        ])
+
+    return len(student_ids)
+
+
+def _compare(key, row, actual, fields, mismatches):
+    for field in fields:
+        value = getattr(row, field) if row else 0
+        expected = actual.get(field, 0)
+        if abs(value - expected) > 1e-6 * max(1, abs(expected)):
+            mismatches.append((key, field, value, expected))
+
+
+def verify_student_stats():
+    """
+    Сравнивает StudentStats и StudentTopicStats с итогами, посчитанными с нуля.
+
+    Returns:
+        Список расхождений (ученик или (ученик, тема), поле, в таблице, на самом деле)
+    """
+    mismatches = []
+
+    totals = aggregate_student_words(StudentWord.objects.all())
+    stored = {stats.student_id: stats for stats in StudentStats.objects.all()}
+    for student_id in sorted(set(totals) | set(stored)):
+        if student_id in totals and student_id not in stored:
+            mismatches.append((student_id, 'строка', None, 'есть слова'))
+            continue
+        _compare(student_id, stored.get(student_id), totals.get(student_id, {}),
+                 StudentStats.counter_fields(), mismatches)
+
+    topic_totals = aggregate_topic_words(StudentWord.objects.all())
+    topic_stored = {(stats.student_id, stats.topic_id): stats for stats in StudentTopicStats.objects.all()}
+    for key in sorted(set(topic_totals) | set(topic_stored)):
+        _compare(key, topic_stored.get(key), topic_totals.get(key, {}),
+                 StudentTopicStats.counter_fields(), mismatches)
+
+    return mismatches
+
+
+def student_word_stats(student):
+    """
+    Статистика слов ученика из StudentStats и StudentTopicStats.
+
+    Returns:
+        {
+            'stats': {'total', 'new', 'learning', 'review', 'completed'},
+            'stats_detail': {'total_words', 'total_attempts', 'total_correct',
+                             'total_wrong', 'avg_response_time',
+                             'total_response_time_min', 'accuracy_percent',
+                             'mastery_levels'},
+            'topics_with_progress': [{'id', 'name', 'color', 'total',
+                                      'learned', 'percent', 'accuracy'}, ...],
+        }
+    """
+    summary = StudentStats.objects.filter(student=student).first() or StudentStats(student=student)
+
+    stats_detail = {
+        'total_words': summary.total_words,
+        'total_attempts': summary.attempts,
+        'total_correct': summary.correct,
+        'total_wrong': summary.wrong,
+        'avg_response_time': summary.get_avg_response_time(),
+        'total_response_time_min': summary.total_response_time / 60000,
+        'accuracy_percent': summary.get_accuracy_percentage(),
+        'mastery_levels': summary.get_mastery_levels(),
+    }
+
+    topics_with_progress = []
+    for topic_stats in (
+        StudentTopicStats.objects.filter(student=student, total_words__gt=0)
+        .select_related('topic').order_by('topic__name')
+    ):
+        topics_with_progress.append({
+            'id': topic_stats.topic_id,
+            'name': topic_stats.topic.name,
+            'color': topic_stats.topic.color,
+            'total': topic_stats.total_words,
+            'learned': topic_stats.words_completed,
+            'percent': topic_stats.get_completed_percentage(),
+            'accuracy': topic_stats.get_accuracy_percentage(),
+        })
+
+    return {
+        'stats': {
+            'total': summary.total_words,
+            **{status: getattr(summary, field) for status, field in StudentStats.STATUS_FIELDS.items()},
+        },
+        'stats_detail': stats_detail,
+        'topics_with_progress': topics_with_progress,
+    }
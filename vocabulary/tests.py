@@ -1,3 +1,184 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users.models import User
+from . import buffer, scheduler
+from .models import StudentStats, StudentWord, Topic, Word, WordAttempt
+
+
+class StudentWordSortKeysTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.topic = Topic.objects.create(name='Еда')
+        cls.words = [
+            Word.objects.create(russian=russian, english=english, topic=cls.topic if i % 2 else None)
+            for i, (russian, english) in enumerate((('яблоко', 'apple'), ('хлеб', 'bread'), ('молоко', 'milk')))
+        ]
+        for word in cls.words:
+            StudentWord.objects.create(student=cls.student, word=word)
+
+    def sort_keys(self):
+        return {
+            row['word_id']: (row['sort_russian'], row['sort_english'], row['sort_topic'])
+            for row in StudentWord.objects.values('word_id', 'sort_russian', 'sort_english', 'sort_topic')
+        }
+
+    def test_copied_on_assignment(self):
+        self.assertEqual(self.sort_keys(), {
+            self.words[0].pk: ('яблоко', 'apple', ''),
+            self.words[1].pk: ('хлеб', 'bread', 'Еда'),
+            self.words[2].pk: ('молоко', 'milk', ''),
+        })
+
+    def test_follow_word_and_topic_changes(self):
+        word = self.words[0]
+        word.russian = 'Груша'
+        word.english = 'pear'
+        word.topic = self.topic
+        word.save()
+        self.assertEqual(self.sort_keys()[word.pk], ('груша', 'pear', 'Еда'))
+
+        self.topic.name = 'Продукты'
+        self.topic.save()
+        self.assertEqual(self.sort_keys()[self.words[1].pk], ('хлеб', 'bread', 'Продукты'))
+
+        self.topic.delete()
+        self.assertEqual(self.sort_keys()[self.words[1].pk], ('хлеб', 'bread', ''))
+
+    def test_word_list_sorted_by_topic(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('vocabulary:student_words'), {'sort': 'topic'})
+        self.assertEqual(
+            [student_word.word_id for student_word in response.context['words']],
+            [self.words[2].pk, self.words[0].pk, self.words[1].pk]
+        )
+
+
+class StudentWordsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        for russian, english in (('кот', 'cat'), ('собака', 'dog')):
+            StudentWord.objects.create(student=cls.student, word=Word.objects.create(russian=russian, english=english))
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+        self.url = reverse('vocabulary:get_student_words', args=[self.student.pk])
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertNotIn('Last-Modified', response.headers)
+
+        # сессия, пользователь, версия ученика
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_deleting_word_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        StudentWord.objects.filter(student=self.student).first().delete()
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_renaming_student_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.student.first_name = 'Ия'
+        self.student.save()
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['student']['name'], 'Ия')
+
+
+class StudentWordStatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.word = Word.objects.create(russian='кот', english='cat')
+        cls.student_word = StudentWord.objects.create(student=cls.student, word=cls.word)
+
+    def test_record_attempt_queries(self):
+        student_word = StudentWord.objects.get(pk=self.student_word.pk)
+        # SAVEPOINT и RELEASE (транзакция теста), попытка, слово до, UPDATE, слово после, сводка ученика
+        with self.assertNumQueries(7):
+            student_word.record_attempt(is_correct=True, response_time=1200)
+        self.assertEqual((student_word.times_attempted, student_word.times_correct), (1, 1))
+
+
+class ReviewQueueTopicTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.topic = Topic.objects.create(name='Срочно', priority=2)
+
+    def shift(self, word):
+        student_word = StudentWord.objects.get(student=self.student, word=word)
+        return student_word.next_review - student_word.review_order
+
+    def test_new_word_uses_topic_priority(self):
+        word = Word.objects.create(russian='кот', english='cat', topic=self.topic)
+        StudentWord.objects.create(student=self.student, word=word)
+        self.assertEqual(self.shift(word), timedelta(days=2 * scheduler.TOPIC_PRIORITY_DAYS))
+
+    def test_topic_change_moves_word_in_queue(self):
+        word = Word.objects.create(russian='кот', english='cat')
+        StudentWord.objects.create(student=self.student, word=word)
+        self.assertEqual(self.shift(word), timedelta())
+
+        word.topic = self.topic
+        word.save()
+        self.assertEqual(self.shift(word), timedelta(days=2 * scheduler.TOPIC_PRIORITY_DAYS))
+
+        self.topic.delete()
+        self.assertEqual(self.shift(word), timedelta())
+
+class WordStatsBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='pass', role='student')
+        cls.words = [Word.objects.create(russian=russian, english=english)
+                     for russian, english in (('кот', 'cat'), ('собака', 'dog'))]
+        for word in cls.words:
+            StudentWord.objects.create(student=cls.student, word=word)
+
+    def setUp(self):
+        buffer.get_cache().clear()
+        self.addCleanup(buffer.get_cache().clear)
+
+    def test_flush_skips_words_deleted_after_buffering(self):
+        for word in self.words:
+            buffer.buffer_attempt(self.student.pk, word.pk, True, 1000)
+        self.words[0].delete()
+
+        with self.assertLogs('vocabulary.buffer', 'WARNING'):
+            self.assertEqual(buffer.flush_word_stats(), 1)
+        self.assertEqual(list(WordAttempt.objects.values_list('word_id', flat=True)), [self.words[1].pk])
+        self.assertEqual(StudentWord.objects.get(word=self.words[1]).times_attempted, 1)
+        self.assertEqual(StudentStats.objects.get(student=self.student).attempts, 1)
+
+        # Буфер продвинулся: следующие ответы переносятся
+        buffer.buffer_attempt(self.student.pk, self.words[1].pk, False, 1000)
+        self.assertEqual(buffer.flush_word_stats(), 1)
+        self.assertEqual(StudentWord.objects.get(word=self.words[1]).times_attempted, 2)
+
+
+class WordStatsBufferSettingsTests(SimpleTestCase):
+    def test_flush_command_needs_shared_cache(self):
+        # Буфер в локальной памяти команда из другого процесса не увидит
+        with self.assertRaises(CommandError):
+            call_command('flush_word_stats')
+
+    @override_settings(WORD_STATS_FLUSH_INTERVAL=0)
+    def test_local_buffer_needs_flush_thread(self):
+        with self.assertRaises(ImproperlyConfigured):
+            buffer.start_flush_thread()
@@ -12,6 +12,10 @@ urlpatterns = [
     # Панель учителя для конкретного ученика
     path('teacher_panel/<int:student_id>/', views.teacher_panel, name='teacher_panel'),
 
+    # Тепловая карта класса
+    path('heatmap/', views.class_heatmap, name='class_heatmap'),
+    path('heatmap/csv/', views.class_heatmap_csv, name='class_heatmap_csv'),
+
     # AJAX-запросы
     path('word/create/ajax/', views.word_create_ajax, name='word_create_ajax'),
     path('topic/create/ajax/', views.topic_create_ajax, name='topic_create_ajax'),
@@ -25,4 +29,6 @@ urlpatterns = [
     path('update_word_status/', views.update_word_status, name='update_word_status'),
     path('api/student/<int:student_id>/words/', views_api.get_student_words, name='get_student_words'),
     path('api/all_words/', views_api.get_all_words, name='get_all_words'),
+    path('api/review_queue/', views_api.get_review_queue, name='review_queue'),
+    path('api/heatmap/', views_api.get_class_heatmap, name='class_heatmap_data'),
 ]
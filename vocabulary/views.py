@@ -1,14 +1,18 @@
+import csv
 import json
 from datetime import timedelta
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Q
 from django.utils import timezone
 
-from .models import Word, Topic, StudentWord
+from .models import Word, Topic, StudentWord, StudentStats
 from .forms import WordCreateForm
+from .heatmap import class_heatmap as build_class_heatmap, heatmap_csv_rows
+from .pagination import keyset_page
 from users.models import User
 from django.views.decorators.http import require_POST
 
@@ -19,7 +23,9 @@ def select_student(request):
     if not request.user.is_teacher():
         return redirect('dashboard:home')
 
-    students = User.objects.filter(role='student')
+    students = User.objects.filter(role='student').select_related('stats').annotate(
+        topic_count=Count('topic_stats', filter=Q(topic_stats__total_words__gt=0))
+    )
 
     return render(request, 'vocabulary/select_student.html', {
         'students': students
@@ -244,6 +250,39 @@ def teacher_panel(request, student_id):
 
 
 
+@login_required
+def class_heatmap(request):
+    """Тепловая карта класса: ученики × темы (данные загружаются из API)"""
+    if not request.user.is_teacher():
+        return redirect('dashboard:home')
+
+    return render(request, 'vocabulary/class_heatmap.html')
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+@login_required
+def class_heatmap_csv(request):
+    """Выгрузка тепловой карты класса в CSV (потоком, по строке на ячейку)"""
+    if not request.user.is_teacher():
+        return redirect('dashboard:home')
+
+    writer = csv.writer(Echo())
+    rows = heatmap_csv_rows(build_class_heatmap(request.user))
+    # BOM — чтобы Excel открыл кириллицу в UTF-8
+    response = StreamingHttpResponse(
+        ('\ufeff' + writer.writerow(row) if i == 0 else writer.writerow(row) for i, row in enumerate(rows)),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename="class_heatmap.csv"'
+    return response
+
+
 @login_required
 @require_POST
 def word_delete_ajax(request):
@@ -290,29 +329,57 @@ def word_delete_ajax(request):
 
 
 # vocabulary/views.py
+WORD_LIST_PAGE_SIZE = 24
+
+# Ключи сортировки списка слов ученика: (поле, по убыванию)
+WORD_LIST_ORDERS = {
+    'date': [('assigned_at', True), ('id', True)],
+    'alphabet': [('sort_russian', False), ('sort_english', False)],
+    'topic': [('sort_topic', False), ('sort_russian', False), ('sort_english', False)],
+}
+
+
 @login_required
 def student_words_list(request):
-    """Полный список слов студента с фильтрацией"""
+    """Полный список слов студента с фильтрацией (постранично, по ключу сортировки)"""
     if not request.user.is_student():
         return redirect('dashboard:home')
 
-    words = StudentWord.objects.filter(student=request.user)
+    words = StudentWord.objects.filter(student=request.user).select_related('word', 'word__topic')
 
     # Фильтрация по статусу
     status = request.GET.get('status')
-    if status and status != 'all':
+    if status not in StudentStats.STATUS_FIELDS:
+        status = None
+    if status:
         words = words.filter(status=status)
 
-    # Сортировка
+    # Сортировка: ключ однозначно задает порядок (слово у ученика одно),
+    # для каждого ключа есть индекс (см. StudentWord.Meta.indexes)
     sort_by = request.GET.get('sort', 'date')
-    if sort_by == 'alphabet':
-        words = words.order_by('word__russian')
-    elif sort_by == 'topic':
-        words = words.order_by('word__topic__name')
-    else:
-        words = words.order_by('-assigned_at')
-
-    return render(request, 'vocabulary/student_words.html', {'words': words})
+    if sort_by not in WORD_LIST_ORDERS:
+        sort_by = 'date'
+    try:
+        page = keyset_page(
+            words,
+            WORD_LIST_ORDERS[sort_by],
+            WORD_LIST_PAGE_SIZE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    except ValueError:
+        return redirect(f"{request.path}?status={status or 'all'}&sort={sort_by}")
+
+    # Количество берется из сводки ученика, а не COUNT(*) на каждой странице
+    summary = StudentStats.objects.filter(student=request.user).first() or StudentStats()
+    total = getattr(summary, StudentStats.STATUS_FIELDS[status]) if status else summary.total_words
+
+    return render(request, 'vocabulary/student_words.html', {
+        'words': page,
+        'total': total,
+        'status': status or 'all',
+        'sort': sort_by,
+    })
 
 
 @login_required
@@ -1,79 +1,233 @@
-from django.http import JsonResponse
+import hashlib
+from datetime import timedelta
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import Http404, JsonResponse
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
 from users.models import User
+from vocabulary.heatmap import class_heatmap
 from vocabulary.models import StudentWord, Word
-import json
+from vocabulary.pagination import keyset_page
+from vocabulary.scheduler import review_queue
+
+
+WORDS_PAGE_SIZE = 500
+WORDS_MAX_PAGE_SIZE = 2000
+
+# synced_at отстает от последнего изменения: строка, измененная в еще не
+# завершенной транзакции, попадет в следующую синхронизацию
+SYNC_OVERLAP = timedelta(minutes=1)
+
+NO_TOPIC_COLOR = '#6c757d'
+
+# Порядок списков — прежний порядок моделей, ключи однозначны и опираются на индексы
+STUDENT_WORDS_KEYS = [('assigned_at', True), ('id', True)]
+ALL_WORDS_KEYS = [('russian', False), ('english', False)]
+
+
+def conditional_json(request, version, build):
+    """
+    Ответ с ETag по версии данных.
+
+    Если у клиента та же версия (If-None-Match), возвращается 304 без
+    тела, и build не вызывается. Одинаковая версия и одинаковые
+    параметры запроса дают одинаковый ответ, поэтому ETag сильный.
+    Last-Modified не отдается: время последнего изменения строк не
+    меняется при удалении слова или переименовании ученика, и клиент
+    с одним If-Modified-Since получил бы устаревший 304.
+    Cache-Control: no-cache — браузер переспрашивает сервер при каждом
+    запросе.
+
+    Args:
+        version: Значение, которое меняется при любом изменении данных ответа
+        build: () → JsonResponse
+    """
+    etag = quote_etag(hashlib.md5(f'{version!r}:{request.GET.urlencode()}'.encode()).hexdigest())
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def words_page(request, rows, keys, serialize, last_updated, id_field='id'):
+    """
+    Страница списка слов для API.
+
+    Без ?since= отдается весь список, с since (ISO 8601) — только строки,
+    добавленные или измененные позже. Страницы по ?limit= строк,
+    следующая — по ?after=<next_cursor>. В ответе:
+      - words, count, next_cursor — страница и курсор следующей;
+      - synced_at — since для следующей синхронизации (None для пустого
+        списка); зависит только от данных, как и весь ответ;
+      - ids — на первой странице с since: все текущие ID слов в порядке
+        списка, чтобы клиент убрал удаленные и расставил измененные.
+
+    Args:
+        rows: values()-queryset строк с полями ключа и updated_at
+        keys: Ключ порядка строк (см. pagination.py)
+        serialize: строка values() → словарь ответа
+        last_updated: Последнее updated_at строк
+        id_field: поле строки с ID слова для ids
+
+    Raises:
+        ValueError: если параметр или курсор неверный
+    """
+    since = request.GET.get('since')
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            raise ValueError('Неверный since')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+    try:
+        limit = int(request.GET.get('limit', WORDS_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('Неверный limit')
+    limit = min(max(limit, 1), WORDS_MAX_PAGE_SIZE)
+    after = request.GET.get('after')
+
+    page = keyset_page(rows.filter(updated_at__gt=since) if since else rows, keys, limit, after=after)
+    words_list = [serialize(row) for row in page]
+
+    response = {
+        'success': True,
+        'words': words_list,
+        'count': len(words_list),
+        'next_cursor': page.next_cursor,
+        'synced_at': (last_updated - SYNC_OVERLAP).isoformat() if last_updated else None,
+    }
+    if since and not after:
+        ordering = [f'-{field}' if descending else field for field, descending in keys]
+        response['ids'] = list(rows.order_by(*ordering).values_list(id_field, flat=True))
+    return response
 
 
 @login_required
 def get_student_words(request, student_id):
-    """Получить слова ученика в формате JSON для AJAX"""
+    """
+    Слова ученика в формате JSON для AJAX (постранично, ?since= — только
+    изменения). Версия ответа — StudentStats.version: она меняется при
+    любом изменении слов ученика, их тем и самого ученика.
+    """
     if not request.user.is_teacher():
         return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
 
-    try:
-        student = get_object_or_404(User, id=student_id, role='student')
-
-        # Получаем слова, назначенные ученику
-        student_words = StudentWord.objects.filter(
-            student=student
-        ).select_related('word', 'word__topic')
-
-        # Формируем список слов
-        words_list = []
-        for sw in student_words:
-            words_list.append({
-                'id': sw.word.id,
-                'russian': sw.word.russian,
-                'english': sw.word.english,
-                'topic': sw.word.topic.name if sw.word.topic else '',
-                'topic_color': sw.word.topic.color if sw.word.topic else '#6c757d',
-                'status': sw.status,
-                'assigned_at': sw.assigned_at.strftime('%d.%m.%Y') if sw.assigned_at else ''
-            })
-
-        return JsonResponse({
-            'success': True,
-            'words': words_list,
-            'student': {
-                'id': student.id,
-                'name': student.get_full_name() or student.username
-            },
-            'count': len(words_list)
-        })
+    student = User.objects.filter(id=student_id, role='student').values(
+        'username', 'first_name', 'last_name', 'stats__version'
+    ).annotate(
+        words_updated_at=Subquery(
+            StudentWord.objects.filter(student=OuterRef('pk')).order_by()
+            .values('student').annotate(last=Max('updated_at')).values('last')
+        )
+    ).first()
+    if student is None:
+        raise Http404('Ученик не найден')
+
+    def build():
+        rows = StudentWord.objects.filter(student_id=student_id).values(
+            'id', 'word_id', 'word__russian', 'word__english', 'word__topic__name', 'word__topic__color',
+            'status', 'assigned_at', 'updated_at'
+        )
+        try:
+            response = words_page(request, rows, STUDENT_WORDS_KEYS, lambda row: {
+                'id': row['word_id'],
+                'russian': row['word__russian'],
+                'english': row['word__english'],
+                'topic': row['word__topic__name'] or '',
+                'topic_color': row['word__topic__color'] or NO_TOPIC_COLOR,
+                'status': row['status'],
+                'assigned_at': timezone.localtime(row['assigned_at']).strftime('%d.%m.%Y'),
+            }, student['words_updated_at'], id_field='word_id')
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+
+        response['student'] = {
+            'id': student_id,
+            'name': f"{student['first_name']} {student['last_name']}".strip() or student['username']
+        }
+        return JsonResponse(response)
 
-    except Exception as e:
-        print(f"Ошибка в get_student_words: {str(e)}")  # Для отладки
-        return JsonResponse({'success': False, 'error': str(e)})
+    return conditional_json(request, (student_id, student['stats__version']), build)
 
 
 @login_required
 def get_all_words(request):
-    """Получить все слова для учителя"""
+    """
+    Все слова для учителя (постранично, ?since= — только изменения).
+    Версия ответа — число слов и последнее Word.updated_at (правка темы
+    тоже обновляет updated_at ее слов).
+    """
     if not request.user.is_teacher():
         return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
 
+    version = Word.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+
+    def build():
+        rows = Word.objects.values('id', 'russian', 'english', 'topic__name', 'topic__color', 'created_at', 'updated_at')
+        try:
+            response = words_page(request, rows, ALL_WORDS_KEYS, lambda row: {
+                'id': row['id'],
+                'russian': row['russian'],
+                'english': row['english'],
+                'topic': row['topic__name'] or '',
+                'topic_color': row['topic__color'] or NO_TOPIC_COLOR,
+                'created_at': timezone.localtime(row['created_at']).strftime('%d.%m.%Y'),
+            }, version['last'])
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+        return JsonResponse(response)
+
+    return conditional_json(request, (version['count'], version['last']), build)
+
+
+REVIEW_QUEUE_LIMIT = 20
+REVIEW_QUEUE_MAX_LIMIT = 100
+
+
+@login_required
+def get_review_queue(request):
+    """Первые слова очереди повторения ученика (?limit=k) для сборки тренировки"""
+    if not request.user.is_student():
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
+
     try:
-        # Получаем все слова
-        words = Word.objects.all().select_related('topic')
-
-        words_list = []
-        for word in words:
-            words_list.append({
-                'id': word.id,
-                'russian': word.russian,
-                'english': word.english,
-                'topic': word.topic.name if word.topic else '',
-                'topic_color': word.topic.color if word.topic else '#6c757d',
-                'created_at': word.created_at.strftime('%d.%m.%Y')
-            })
-
-        return JsonResponse({
-            'success': True,
-            'words': words_list,
-            'count': len(words_list)
+        limit = int(request.GET.get('limit', REVIEW_QUEUE_LIMIT))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Неверный limit'})
+    limit = min(max(limit, 1), REVIEW_QUEUE_MAX_LIMIT)
+
+    words_list = []
+    for sw in review_queue(request.user, limit):
+        words_list.append({
+            'id': sw.id,
+            'word_id': sw.word.id,
+            'russian': sw.word.russian,
+            'english': sw.word.english,
+            'topic': sw.word.topic.name if sw.word.topic else '',
+            'topic_color': sw.word.topic.color if sw.word.topic else '#6c757d',
+            'status': sw.status,
+            'next_review': sw.next_review.isoformat() if sw.next_review else None,
+            'error_rate': round(sw.recent_error_rate, 2)
         })
 
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
\ No newline at end of file
+    return JsonResponse({
+        'success': True,
+        'words': words_list,
+        'count': len(words_list)
+    })
+
+
+@login_required
+def get_class_heatmap(request):
+    """Матрица ученик × тема (точность, доля изученных, время ответа) для тепловой карты"""
+    if not request.user.is_teacher():
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
+
+    return JsonResponse({'success': True, **class_heatmap(request.user)})